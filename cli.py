@@ -0,0 +1,350 @@
+# cli.py
+"""
+Executor em lote (sem Flask) para simulações de séries.
+
+Lê confrontos de um arquivo ou da entrada padrão, um por linha, em um dos formatos:
+    sentinels g2-esports md3
+    {"teamA": "sentinels", "teamB": "g2-esports", "format": "md3", "seed": 7, "maps": ["bind", "haven", "lotus"]}
+Linhas vazias ou iniciadas com '#' são ignoradas. Cada resultado é escrito como uma linha
+de JSON (NDJSON), na mesma ordem da entrada. Linhas que não podem ser lidas não interrompem o
+lote: viram registros {"line": N, "error": ...} no início da saída.
+
+Exemplo:
+    python cli.py confrontos.txt -j 8 --seed 42 --repeat 100 -o resultados.ndjson
+
+Com --summary, em vez de uma linha por série, escreve uma linha por confronto com as
+distribuições agregadas (placares, frequência de prorrogação e percentis p5/p50/p95 de
+abates/mortes por jogador). Cada processo agrega em memória constante e os resumos são
+combinados no final:
+    python cli.py confrontos.txt -j 8 --repeat 100000 --summary
+
+Com --season N, simula N temporadas das quatro ligas regionais (todos contra todos) e escreve
+a probabilidade de classificação de cada equipe:
+    python cli.py --season 1000 -j 8 --seed 42
+Os elencos de cada temporada saem de realizações sorteadas em bloco (sem uma chamada por stat);
+--stat-correlation faz um jogador que sorteia bem em uma stat tender a sortear bem nas outras.
+
+Com --store DIR, cada série também é gravada no histórico consultado pela rota /api/results:
+    python cli.py confrontos.txt -j 8 --repeat 1000 --store results_store
+
+Os módulos do motor só são importados dentro dos processos de trabalho, então o processo
+principal sobe rápido e nunca importa o framework web.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import sys
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+# Estado de cada processo de trabalho, preenchido por _init_worker
+_teams = None
+_player_stats = None
+
+
+def parse_matchup(line: str, line_number: int, default_format: str) -> Dict[str, Any]:
+    """Converte uma linha de entrada em um confronto. Levanta ValueError se a linha for inválida."""
+    if line.startswith('{'):
+        try:
+            matchup = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Linha {line_number}: JSON inválido ({e.msg}).")
+        if not isinstance(matchup, dict):
+            raise ValueError(f"Linha {line_number}: esperado um objeto JSON.")
+    else:
+        parts = line.split()
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Linha {line_number}: esperado 'timeA timeB [formato]', recebido {line!r}")
+        matchup = {'teamA': parts[0], 'teamB': parts[1]}
+        if len(parts) == 3:
+            matchup['format'] = parts[2]
+    if not isinstance(matchup.get('teamA'), str) or not isinstance(matchup.get('teamB'), str):
+        raise ValueError(f"Linha {line_number}: 'teamA' e 'teamB' são obrigatórios (texto).")
+    matchup.setdefault('format', default_format)
+    if not isinstance(matchup['format'], str):
+        raise ValueError(f"Linha {line_number}: 'format' deve ser texto.")
+    if matchup.get('maps') is None:
+        matchup.pop('maps', None)
+    elif not isinstance(matchup['maps'], list) or not all(isinstance(m, str) for m in matchup['maps']):
+        raise ValueError(f"Linha {line_number}: 'maps' deve ser uma lista de nomes de mapas.")
+    seed = matchup.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+        raise ValueError(f"Linha {line_number}: 'seed' deve ser um inteiro.")
+    if seed is None:
+        matchup.pop('seed', None)
+    return matchup
+
+
+def read_matchups(source: TextIO, default_format: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Devolve os confrontos válidos e um registro de erro por linha inválida."""
+    matchups, errors = [], []
+    for line_number, line in enumerate(source, start=1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            try:
+                matchups.append(parse_matchup(line, line_number, default_format))
+            except ValueError as e:
+                errors.append({'line': line_number, 'error': str(e)})
+    return matchups, errors
+
+
+def expand_jobs(matchups: List[Dict[str, Any]], repeat: int, base_seed: Optional[int]) -> Iterator[Dict[str, Any]]:
+    """
+    Gera um job por repetição de cada confronto. A seed de cada job é fixa (a da linha,
+    ou base + índice), então o resultado não depende do número de processos.
+    """
+    index = 0
+    for matchup in matchups:
+        for replica in range(repeat):
+            job = dict(matchup)
+            if 'seed' in matchup:
+                job['seed'] = matchup['seed'] + replica
+            elif base_seed is not None:
+                job['seed'] = base_seed + index
+            else:
+                job['seed'] = None
+            job['replica'] = replica
+            index += 1
+            yield job
+
+
+def _init_worker(data_dir: Optional[str]) -> None:
+    global _teams, _player_stats
+    from src.simulate_series_stream_flow import DATA_DIR, load_match_data
+
+    _teams, _player_stats = load_match_data(data_dir or DATA_DIR)
+
+
+def _job_error(job: Dict[str, Any]) -> Optional[str]:
+    """Devolve a mensagem de erro do confronto, ou None se ele pode ser simulado."""
+    from src.simulate_series_stream_flow import FORMAT_GAMES_TO_WIN, check_series_format
+
+    for key in ('teamA', 'teamB'):
+        if job[key] not in _teams:
+            return f"Time não encontrado: {job[key]}"
+    if job['format'] not in FORMAT_GAMES_TO_WIN:
+        return f"Formato inválido: {job['format']}"
+    try:
+        check_series_format(job['format'], job.get('maps'))
+    except ValueError:
+        return f"Mapas insuficientes para o formato {job['format']}: {job['maps']}"
+    return None
+
+
+def run_job(job: Dict[str, Any], full: bool) -> Dict[str, Any]:
+    import random
+
+    from src.simulate_series_stream_flow import FORMAT_GAMES_TO_WIN, simulate_matchup
+
+    result: Dict[str, Any] = {
+        'teamA': job['teamA'],
+        'teamB': job['teamB'],
+        'format': job['format'],
+        'seed': job['seed'],
+        'replica': job['replica'],
+    }
+    error = _job_error(job)
+    if error:
+        result['error'] = error
+        return result
+
+    random.seed(job['seed'])
+    output = simulate_matchup(
+        _teams, _player_stats, job['teamA'], job['teamB'], FORMAT_GAMES_TO_WIN[job['format']], job.get('maps')
+    )
+    result['winner'] = job['teamA'] if output.winner == 'A' else job['teamB']
+    result['teamAScore'] = output.teamAScore
+    result['teamBScore'] = output.teamBScore
+    result['maps'] = [{'map': m.map, 'scoreA': m.scoreA, 'scoreB': m.scoreB} for m in output.mapResults]
+    if full:
+        result['series'] = output.model_dump()
+    return result
+
+
+def _summarize_chunk(jobs: List[Dict[str, Any]]) -> Tuple[Dict[tuple, Any], Dict[tuple, str]]:
+    """
+    Simula um bloco de jobs e devolve um resumo de distribuições por confronto, junto com
+    o erro de cada confronto inválido.
+    """
+    import random
+
+    from src.distributions import SeriesDistributions
+    from src.simulate_series_stream_flow import FORMAT_GAMES_TO_WIN, simulate_matchup
+
+    summaries: Dict[tuple, Any] = {}
+    errors: Dict[tuple, str] = {}
+    for job in jobs:
+        key = (job['teamA'], job['teamB'], job['format'], tuple(job.get('maps', ())))
+        error = _job_error(job)
+        if error:
+            errors[key] = error
+            continue
+        if key not in summaries:
+            summaries[key] = SeriesDistributions()
+        random.seed(job['seed'])
+        summaries[key].add_series(
+            simulate_matchup(
+                _teams, _player_stats, job['teamA'], job['teamB'], FORMAT_GAMES_TO_WIN[job['format']], job.get('maps')
+            )
+        )
+    return summaries, errors
+
+
+def run_summary(
+    jobs: Iterator[Dict[str, Any]], args: argparse.Namespace
+) -> Tuple[Dict[tuple, Any], Dict[tuple, str]]:
+    chunks = iter(lambda: list(itertools.islice(jobs, 256)), [])
+    totals: Dict[tuple, Any] = {}
+    errors: Dict[tuple, str] = {}
+
+    def collect(partials: Iterator[Tuple[Dict[tuple, Any], Dict[tuple, str]]]) -> None:
+        for partial, partial_errors in partials:
+            for key, summary in partial.items():
+                if key in totals:
+                    totals[key].merge(summary)
+                else:
+                    totals[key] = summary
+            errors.update(partial_errors)
+
+    if args.jobs <= 1:
+        _init_worker(args.data_dir)
+        collect(map(_summarize_chunk, chunks))
+    else:
+        with multiprocessing.Pool(args.jobs, initializer=_init_worker, initargs=(args.data_dir,)) as pool:
+            collect(pool.imap_unordered(_summarize_chunk, chunks))
+    return totals, errors
+
+
+def _run_job_full(job: Dict[str, Any]) -> Dict[str, Any]:
+    return run_job(job, True)
+
+
+def _run_job_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    return run_job(job, False)
+
+
+class ResultWriter:
+    """Escreve cada resultado em NDJSON e, com --store, grava as séries no histórico em lotes."""
+
+    def __init__(self, out: TextIO, store_dir: Optional[str], full: bool, batch_size: int = 256):
+        self.out = out
+        self.full = full
+        self.batch_size = batch_size
+        self.pending: List[tuple] = []
+        self.store = None
+        if store_dir:
+            from src.results_store import ResultsStore
+
+            self.store = ResultsStore(store_dir)
+
+    def write(self, result: Dict[str, Any]) -> None:
+        if self.store is not None and 'series' in result:
+            series = result['series'] if self.full else result.pop('series')
+            self.pending.append((result['teamA'], result['teamB'], series))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+        self.out.write(json.dumps(result) + '\n')
+
+    def flush(self) -> None:
+        if self.pending:
+            self.store.append_many(self.pending)
+            self.pending = []
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Simula séries em lote e escreve os resultados em NDJSON.")
+    parser.add_argument('input', nargs='?', default='-', help="Arquivo de confrontos ('-' para a entrada padrão).")
+    parser.add_argument('-o', '--output', default='-', help="Arquivo de saída ('-' para a saída padrão).")
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help="Número de processos.")
+    parser.add_argument('--seed', type=int, default=None, help="Seed base; cada job recebe seed + índice.")
+    parser.add_argument('--repeat', type=int, default=1, help="Quantas vezes simular cada confronto.")
+    parser.add_argument('--format', default='md3', help="Formato padrão quando a linha não informa (md1, md3, md5).")
+    parser.add_argument('--full', action='store_true', help="Inclui a saída completa da série (stats dos jogadores).")
+    parser.add_argument('--summary', action='store_true',
+                        help="Escreve só as distribuições agregadas por confronto, sem uma linha por série.")
+    parser.add_argument('--data-dir', default=None, help="Diretório com teams.json e player_stats.json.")
+    parser.add_argument('--store', default=None, metavar='DIR',
+                        help="Também grava cada série no histórico em DIR (consultado por /api/results).")
+    parser.add_argument('--season', type=int, default=None, metavar='N',
+                        help="Simula N temporadas das ligas regionais em vez de ler confrontos.")
+    parser.add_argument('--spots', type=int, default=3, help="Vagas de classificação por liga (com --season).")
+    parser.add_argument('--stat-correlation', type=float, default=0.0,
+                        help="Correlação entre as stats sorteadas de cada jogador, de 0 a 1 (com --season).")
+    return parser
+
+
+def run_season(args: argparse.Namespace) -> Dict[str, Any]:
+    from src.simulate_league_season_flow import forecast_league_seasons
+    from src.simulate_series_stream_flow import DATA_DIR, FORMAT_GAMES_TO_WIN
+
+    return forecast_league_seasons(
+        args.season,
+        processes=args.jobs,
+        games_to_win=FORMAT_GAMES_TO_WIN[args.format],
+        qualifying_spots=args.spots,
+        seed=args.seed,
+        data_dir=args.data_dir or DATA_DIR,
+        stat_correlation=args.stat_correlation,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.season is not None:
+        report = run_season(args)
+        if args.output == '-':
+            print(json.dumps(report))
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f)
+        return 0
+
+    if args.input == '-':
+        matchups, line_errors = read_matchups(sys.stdin, args.format)
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            matchups, line_errors = read_matchups(f, args.format)
+
+    if args.store and args.summary:
+        build_parser().error("--store não pode ser usado com --summary.")
+
+    jobs = expand_jobs(matchups, max(1, args.repeat), args.seed)
+    worker = _run_job_full if args.full or args.store else _run_job_summary
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    writer = ResultWriter(out, args.store, args.full)
+    try:
+        for error in line_errors:
+            out.write(json.dumps(error) + '\n')
+        if args.summary:
+            totals, errors = run_summary(jobs, args)
+            for (team_a, team_b, series_format, maps), summary in sorted(totals.items()):
+                report = {'teamA': team_a, 'teamB': team_b, 'format': series_format, **summary.report()}
+                if maps:
+                    report['mapPool'] = list(maps)
+                out.write(json.dumps(report) + '\n')
+            # Um registro de erro por confronto inválido, como no modo sem --summary
+            for (team_a, team_b, series_format, maps), error in sorted(errors.items()):
+                report = {'teamA': team_a, 'teamB': team_b, 'format': series_format, 'error': error}
+                if maps:
+                    report['mapPool'] = list(maps)
+                out.write(json.dumps(report) + '\n')
+        elif args.jobs <= 1:
+            _init_worker(args.data_dir)
+            for result in map(worker, jobs):
+                writer.write(result)
+        else:
+            with multiprocessing.Pool(args.jobs, initializer=_init_worker, initargs=(args.data_dir,)) as pool:
+                for result in pool.imap(worker, jobs, chunksize=16):
+                    writer.write(result)
+        writer.flush()
+        out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
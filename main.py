@@ -2,7 +2,11 @@
 import sys
 import os
 import json
+import math
 import time
+import atexit
+import threading
+from datetime import datetime
 
 # --- Correção do PYTHONPATH ---
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -18,10 +22,107 @@ if venv_path not in sys.path:
 # --- Fim da Correção ---
 
 from flask import Flask, jsonify, request, send_file, send_from_directory, Response, stream_with_context
-from simulate_series_flow import simulate_series # Importa a função correta
+from src.simulation_worker_pool import SimulationWorkerPool
+from src.simulation_jobs import SimulationJobQueue
+from src.broadcast_hub import BroadcastHub
+from src.event_serialization import coalesce_ndjson, encode_event
+from src.admission_control import AdmissionController, Overloaded, estimate_cost
+from src.simulate_series_stream_flow import ENGINE_MODES, FORMAT_GAMES_TO_WIN, load_match_data
+from src.what_if_flow import WhatIfInput, WhatIfSimulator
+from src.results_store import ResultsStore
 
 app = Flask(__name__, static_folder='static', static_url_path='')
 
+# --- Pool de workers de simulação ---
+# Criado sob demanda para que o processo observador do reloader do Flask não suba workers.
+SIM_WORKERS = int(os.environ.get('SIM_WORKERS', os.cpu_count() or 1))
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def get_worker_pool() -> SimulationWorkerPool:
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = SimulationWorkerPool(SIM_WORKERS, data_dir=os.path.join(project_root, 'data'))
+            atexit.register(_worker_pool.shutdown)
+    return _worker_pool
+
+# --- Hub de transmissão (uma simulação, vários espectadores) ---
+STREAM_PACE_SECONDS = 0.1 # Pequeno delay para a UI conseguir renderizar
+# Intervalo para agrupar vários eventos em uma única escrita (0 = um evento por escrita)
+STREAM_FLUSH_INTERVAL = float(os.environ.get('SIM_STREAM_FLUSH_INTERVAL', 0.25))
+_broadcast_hub = BroadcastHub(buffer_size=256, pace=STREAM_PACE_SECONDS)
+
+# --- Controle de admissão ---
+# Cada stream ocupa um worker do pool e um custo estimado (mapas x modo do motor).
+# Sob carga, novos pedidos passam para o modelo rápido sem pacing; sem espaço, esperam
+# na fila por prioridade e, se ela estiver cheia ou o tempo acabar, recebem 503 + Retry-After.
+_admission = AdmissionController(
+    budget=float(os.environ.get('SIM_ADMISSION_BUDGET', SIM_WORKERS * 30)),
+    max_streams=SIM_WORKERS,
+    max_queue=int(os.environ.get('SIM_ADMISSION_QUEUE', SIM_WORKERS * 4)),
+    queue_timeout=float(os.environ.get('SIM_ADMISSION_TIMEOUT', 10)),
+)
+
+def admitted(events, admission):
+    """Repassa os eventos e libera a vaga de admissão quando o stream termina."""
+    try:
+        yield from events
+    finally:
+        admission.release()
+
+# --- Fila de jobs assíncronos (simulações pesadas) ---
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> SimulationJobQueue:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = SimulationJobQueue(
+                os.environ.get('SIM_JOBS_DB', os.path.join(project_root, 'jobs.sqlite3')),
+                workers=int(os.environ.get('SIM_JOB_WORKERS', 2)),
+                data_dir=os.path.join(project_root, 'data'),
+                ttl_seconds=float(os.environ.get('SIM_JOB_TTL', 24 * 60 * 60)),
+            )
+            atexit.register(_job_queue.shutdown)
+    return _job_queue
+
+# --- Simulações "e se" (what-if) ---
+# Mantém em memória os baselines já simulados; cada pergunta só refaz o time alterado.
+_what_if = None
+_what_if_lock = threading.Lock()
+# Cada bloco de réplicas de what-if conta no orçamento de admissão como um stream no modo detalhado
+WHAT_IF_REPLICAS_PER_STREAM = 2000
+
+def get_what_if() -> WhatIfSimulator:
+    global _what_if
+    with _what_if_lock:
+        if _what_if is None:
+            _what_if = WhatIfSimulator(*load_match_data(os.path.join(project_root, 'data')))
+    return _what_if
+
+# --- Histórico de resultados (gravado pela CLI com --store) ---
+SIM_RESULTS_DIR = os.environ.get('SIM_RESULTS_DIR', os.path.join(project_root, 'results_store'))
+_results_store = None
+_results_store_lock = threading.Lock()
+
+def get_results_store() -> ResultsStore:
+    global _results_store
+    with _results_store_lock:
+        if _results_store is None:
+            _results_store = ResultsStore(SIM_RESULTS_DIR)
+    return _results_store
+
+def parse_date(value):
+    """Aceita um timestamp Unix ou uma data ISO 8601 (ex.: 2025-06-01)."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
 # Rota para a página principal
 @app.route("/")
 def index():
@@ -57,8 +158,8 @@ def serve_team_logo(filename):
 @app.route("/api/simulate_series", methods=['GET'])
 def handle_simulation_stream():
     """
-    Esta rota aceita os parâmetros da partida via GET, chama a simulação em modo streaming
-    e retorna os eventos um a um.
+    Esta rota aceita os parâmetros da partida via GET, executa a simulação em um worker do pool
+    e retorna os eventos um a um. Se o cliente desconectar, o job é cancelado no worker.
     """
     team_a_id = request.args.get('teamA')
     team_b_id = request.args.get('teamB')
@@ -73,24 +174,177 @@ def handle_simulation_stream():
     except json.JSONDecodeError:
         return jsonify({"error": "Parâmetro 'maps' inválido. Deve ser um JSON array de strings."}), 400
 
+    if series_format not in FORMAT_GAMES_TO_WIN:
+        return jsonify({"error": "Parâmetro 'format' inválido. Use md1, md3 ou md5."}), 400
+
+    mode = request.args.get('mode', 'detailed')
+    if mode not in ENGINE_MODES:
+        return jsonify({"error": "Parâmetro 'mode' inválido. Use 'detailed' ou 'fast'."}), 400
+
+    # Com broadcast=1, espectadores com os mesmos parâmetros compartilham a mesma simulação
+    broadcast = request.args.get('broadcast') == '1'
+    key = (team_a_id, team_b_id, series_format, mode, json.dumps(maps))
+    max_games = FORMAT_GAMES_TO_WIN[series_format] * 2 - 1
+    params = {
+        "teamA": team_a_id,
+        "teamB": team_b_id,
+        "format": series_format,
+        "maps": maps,
+        "mode": mode,
+    }
+
+    def overloaded(e):
+        return jsonify({"error": "Servidor sobrecarregado, tente novamente mais tarde."}), 503, {"Retry-After": str(e.retry_after)}
+
+    admission = None
+    if broadcast:
+        # A admissão é decidida dentro do hub: só o pedido que de fato inicia o broadcast paga
+        # a vaga, que fica com o broadcast até a simulação terminar. Quem entra em um broadcast
+        # já em andamento não gera nova simulação.
+        def start_broadcast():
+            slot = _admission.admit(max_games, mode, priority=0)
+            params["mode"] = slot.mode
+            try:
+                return admitted(get_worker_pool().stream(params), slot)
+            except BaseException:
+                slot.release()
+                raise
+
+        try:
+            events = _broadcast_hub.subscribe(key, start_broadcast)
+        except Overloaded as e:
+            return overloaded(e)
+    else:
+        try:
+            admission = _admission.admit(max_games, mode, priority=1)
+        except Overloaded as e:
+            return overloaded(e)
+        params["mode"] = admission.mode
+        try:
+            # O pool devolve um gerador; fechá-lo (desconexão do cliente) cancela o job no worker
+            events = admitted(get_worker_pool().stream(params), admission)
+        except BaseException:
+            admission.release()
+            raise
+
+    def paced(events):
+        for event in events:
+            yield event
+            time.sleep(STREAM_PACE_SECONDS)
+
     def event_stream():
-        """Gera os eventos da simulação."""
+        """Gera os eventos da simulação, agrupados em blocos de linhas NDJSON."""
         try:
-            # A função simulate_series é um gerador que produz os eventos
-            for event in simulate_series(team_a_id, team_b_id, series_format, maps):
-                # Envia cada evento como uma linha de JSON (Server-Sent Events like format)
-                yield json.dumps(event) + '\n'
-                time.sleep(0.1) # Pequeno delay para a UI conseguir renderizar
+            # Cada evento vira uma linha de JSON (Server-Sent Events like format).
+            # No broadcast o ritmo já é dado pelo hub; sob carga o pacing é removido.
+            source = events if broadcast or not admission.paced else paced(events)
+            yield from coalesce_ndjson(source, STREAM_FLUSH_INTERVAL)
         except Exception as e:
             # Log do erro no servidor
             print(f"Erro durante a simulação: {e}")
             # Opcional: envia um evento de erro para o cliente
             error_event = {"type": "error", "message": str(e)}
-            yield json.dumps(error_event) + '\n'
+            yield encode_event(error_event)
+        finally:
+            events.close()
 
     # Retorna uma resposta de streaming
     # O mimetype 'application/x-ndjson' (Newline Delimited JSON) é apropriado para este tipo de stream
-    return Response(stream_with_context(event_stream()), mimetype='application/x-ndjson')
+    response = Response(stream_with_context(event_stream()), mimetype='application/x-ndjson')
+    # Garante a saída do broadcast / liberação da vaga mesmo se o cliente sair antes do stream começar
+    response.call_on_close(events.close)
+    if admission is not None:
+        response.call_on_close(admission.release)
+    return response
+
+
+# --- Rotas de jobs assíncronos ---
+@app.route("/api/jobs", methods=['POST'])
+def submit_job():
+    """Enfileira um job pesado (ex.: 'series_odds', 'matchup_matrix') e devolve o seu id."""
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "O corpo da requisição deve ser um objeto JSON."}), 400
+    try:
+        job_id = get_job_queue().submit(body.get('kind'), body.get('params') or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"id": job_id, "status": "queued"}), 202
+
+@app.route("/api/jobs/<job_id>", methods=['GET'])
+def get_job(job_id):
+    """Retorna status, progresso e (quando pronto) o resultado do job."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado."}), 404
+    return jsonify(job)
+
+@app.route("/api/jobs/<job_id>", methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancela um job enfileirado ou em execução."""
+    if not get_job_queue().cancel(job_id):
+        return jsonify({"error": "Job não encontrado ou já finalizado."}), 404
+    return jsonify({"id": job_id, "status": "cancelling"}), 202
+
+
+# --- Rota de what-if ---
+@app.route("/api/what_if", methods=['POST'])
+def what_if():
+    """Compara as chances de um confronto antes e depois de trocas de jogadores ou de tiers."""
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "O corpo da requisição deve ser um objeto JSON."}), 400
+    try:
+        params = WhatIfInput(**body)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    games_to_win = FORMAT_GAMES_TO_WIN.get(params.format)
+    if games_to_win is None:
+        return jsonify({"error": "Parâmetro 'format' inválido. Use md1, md3 ou md5."}), 400
+
+    # A simulação roda nesta thread; ela ocupa uma vaga do controle de admissão como um stream,
+    # com custo proporcional às réplicas (baseline e variante)
+    cost = estimate_cost(games_to_win * 2 - 1, 'detailed') * math.ceil(params.iterations / WHAT_IF_REPLICAS_PER_STREAM)
+    try:
+        admission = _admission.admit(games_to_win * 2 - 1, priority=1, cost=cost)
+    except Overloaded as e:
+        return jsonify({"error": "Servidor sobrecarregado, tente novamente mais tarde."}), 503, {"Retry-After": str(e.retry_after)}
+    try:
+        result = get_what_if().run(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        admission.release()
+    return jsonify(result)
+
+
+# --- Rota de consultas ao histórico ---
+@app.route("/api/results/<query>", methods=['GET'])
+def query_results(query):
+    """
+    Consultas agregadas ao histórico de séries: 'head_to_head' (teamA, teamB), 'player_kd'
+    (player, last) e 'overtime_rate' (team). Todas aceitam 'since' e 'until'; 'map' filtra
+    head_to_head e overtime_rate.
+    """
+    args = request.args
+    try:
+        since, until = parse_date(args.get('since')), parse_date(args.get('until'))
+        store = get_results_store()
+        if query == 'head_to_head':
+            if not args.get('teamA') or not args.get('teamB'):
+                return jsonify({"error": "Parâmetros 'teamA' e 'teamB' são obrigatórios."}), 400
+            result = store.head_to_head(args['teamA'], args['teamB'], args.get('map'), since, until)
+        elif query == 'player_kd':
+            if not args.get('player'):
+                return jsonify({"error": "Parâmetro 'player' é obrigatório."}), 400
+            result = store.player_kd(args['player'], int(args.get('last', 10)), since, until)
+        elif query == 'overtime_rate':
+            result = store.overtime_rate(args.get('team'), args.get('map'), since, until)
+        else:
+            return jsonify({"error": f"Consulta desconhecida: {query}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
 
 
 def main():
@@ -0,0 +1,132 @@
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# Relative CPU cost of simulating one map in each engine mode
+MODE_COST = {'detailed': 10.0, 'fast': 1.0}
+
+
+def estimate_cost(max_games: int, mode: str) -> float:
+    return max_games * MODE_COST[mode]
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted; `retry_after` is a hint in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Simulation capacity exhausted, retry in {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class Admission:
+    """
+    A granted slot. `mode` and `paced` may differ from what was asked for when the
+    controller degraded the request. Call `release()` exactly once when the stream ends.
+    """
+
+    def __init__(self, controller: 'AdmissionController', cost: float, mode: str, paced: bool):
+        self._controller = controller
+        self.cost = cost
+        self.mode = mode
+        self.paced = paced
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self, time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """
+    Bounded budget of concurrent simulation cost with a priority queue in front of it.
+
+    Requests are admitted while both the cost budget and the stream limit have room.
+    Once load crosses `degrade_at`, new requests are degraded (detailed -> fast engine,
+    no pacing) so they are cheaper and release their slot sooner. If there is still no
+    room, the request waits in the queue (lower `priority` value first) for up to
+    `queue_timeout` seconds, and is rejected with a Retry-After hint when the queue is
+    full or the wait times out. Admitted requests are never slowed down by later ones.
+    """
+
+    def __init__(
+        self,
+        budget: float,
+        max_streams: int,
+        max_queue: int,
+        queue_timeout: float,
+        degrade_at: float = 0.75,
+    ):
+        self.budget = budget
+        self.max_streams = max_streams
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.degrade_at = degrade_at
+        self._cond = threading.Condition()
+        self._in_flight_cost = 0.0
+        self._streams = 0
+        self._waiting: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._avg_hold = 5.0  # Moving average of how long a slot is held, in seconds
+
+    def _fits(self, cost: float) -> bool:
+        return self._streams < self.max_streams and self._in_flight_cost + cost <= self.budget
+
+    def _load(self) -> float:
+        return max(self._in_flight_cost / self.budget, self._streams / self.max_streams)
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._avg_hold * (len(self._waiting) + 1) / self.max_streams))
+
+    def admit(
+        self, max_games: int, mode: str = 'detailed', priority: int = 1, cost: Optional[float] = None
+    ) -> Admission:
+        """
+        Waits for a slot for a stream of up to `max_games` maps. Work that is not a series
+        stream passes its own `cost` instead, which is not reduced by degradation.
+        """
+        with self._cond:
+            paced = True
+            if self._waiting or self._load() >= self.degrade_at:
+                mode = 'fast'
+                paced = False
+            cost = min(estimate_cost(max_games, mode) if cost is None else cost, self.budget)
+
+            if not self._waiting and self._fits(cost):
+                return self._grant(cost, mode, paced)
+
+            if len(self._waiting) >= self.max_queue:
+                raise Overloaded(self._retry_after())
+
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while not (self._waiting[0] == ticket and self._fits(cost)):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Overloaded(self._retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            return self._grant(cost, mode, paced)
+
+    def _grant(self, cost: float, mode: str, paced: bool) -> Admission:
+        self._in_flight_cost += cost
+        self._streams += 1
+        return Admission(self, cost, mode, paced)
+
+    def _release(self, admission: Admission, held_for: float) -> None:
+        with self._cond:
+            self._in_flight_cost -= admission.cost
+            self._streams -= 1
+            self._avg_hold = 0.8 * self._avg_hold + 0.2 * held_for
+            self._cond.notify_all()
+
@@ -0,0 +1,145 @@
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional
+
+EventSource = Callable[[], Iterator[Dict[str, Any]]]
+
+
+class _Subscriber:
+    def __init__(self, buffer_size: int):
+        self.buffer: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+
+
+class _Broadcast:
+    def __init__(self, key: Hashable, lock: threading.Lock):
+        self.key = key
+        self.cond = threading.Condition(lock)
+        self.history: List[Dict[str, Any]] = []
+        self.subscribers: List[_Subscriber] = []
+        self.finished = False
+        self.error: Optional[str] = None
+
+
+class BroadcastHub:
+    """
+    Runs one simulation per distinct match and fans its events out to every subscriber.
+
+    The producer paces the broadcast itself, so subscribers just forward what they receive.
+    Late joiners first receive every event emitted so far, then the live feed. Each
+    subscriber buffers at most `buffer_size` live events; a slow reader loses the oldest
+    ones, which is harmless because every event carries a full state snapshot.
+    The simulation is cancelled as soon as its last subscriber leaves.
+    """
+
+    def __init__(self, buffer_size: int = 256, pace: float = 0.0):
+        self._buffer_size = buffer_size
+        self._pace = pace
+        self._lock = threading.Lock()
+        self._broadcasts: Dict[Hashable, _Broadcast] = {}
+
+    def subscribe(self, key: Hashable, source: EventSource) -> 'Subscription':
+        """
+        Joins the broadcast for `key`. `source` is only called (once, before this returns)
+        if no broadcast is live for that key yet. If `source` raises, the broadcast is ended
+        (anyone who joined it meanwhile gets the error) and the exception propagates.
+        """
+        subscriber = _Subscriber(self._buffer_size)
+        with self._lock:
+            broadcast = self._broadcasts.get(key)
+            start = broadcast is None
+            if start:
+                broadcast = _Broadcast(key, self._lock)
+                self._broadcasts[key] = broadcast
+            broadcast.subscribers.append(subscriber)
+            catch_up = list(broadcast.history)
+        if start:
+            try:
+                events = source()
+            except BaseException as e:
+                with broadcast.cond:
+                    broadcast.error = str(e) or type(e).__name__
+                    broadcast.finished = True
+                    broadcast.subscribers.remove(subscriber)
+                    self._detach(broadcast)
+                    broadcast.cond.notify_all()
+                raise
+            threading.Thread(target=self._produce, args=(broadcast, events), daemon=True).start()
+        return Subscription(self, broadcast, subscriber, catch_up)
+
+    def _consume(
+        self, broadcast: _Broadcast, subscriber: _Subscriber, catch_up: List[Dict[str, Any]]
+    ) -> Iterator[Dict[str, Any]]:
+        try:
+            yield from catch_up
+            while True:
+                with broadcast.cond:
+                    while not subscriber.buffer and not broadcast.finished:
+                        broadcast.cond.wait()
+                    batch = list(subscriber.buffer)
+                    subscriber.buffer.clear()
+                    done = broadcast.finished
+                yield from batch
+                if done and not batch:
+                    break
+            if broadcast.error:
+                raise RuntimeError(broadcast.error)
+        finally:
+            self._leave(broadcast, subscriber)
+
+    def _leave(self, broadcast: _Broadcast, subscriber: _Subscriber) -> None:
+        with self._lock:
+            if subscriber in broadcast.subscribers:
+                broadcast.subscribers.remove(subscriber)
+            if not broadcast.subscribers:
+                self._detach(broadcast)
+
+    def _detach(self, broadcast: _Broadcast) -> None:
+        # Must hold self._lock. New viewers after this point start a fresh broadcast.
+        if self._broadcasts.get(broadcast.key) is broadcast:
+            del self._broadcasts[broadcast.key]
+
+    def _produce(self, broadcast: _Broadcast, events: Iterator[Dict[str, Any]]) -> None:
+        try:
+            for event in events:
+                with broadcast.cond:
+                    if not broadcast.subscribers:
+                        break
+                    broadcast.history.append(event)
+                    for subscriber in broadcast.subscribers:
+                        subscriber.buffer.append(event)
+                    broadcast.cond.notify_all()
+                if self._pace:
+                    time.sleep(self._pace)
+        except Exception as e:
+            broadcast.error = str(e)
+        finally:
+            events.close()
+            with broadcast.cond:
+                broadcast.finished = True
+                self._detach(broadcast)
+                broadcast.cond.notify_all()
+
+
+class Subscription:
+    """
+    Iterator over one subscriber's events. Unlike a bare generator, closing it leaves the
+    broadcast even if iteration never started (e.g. the client left before the first byte).
+    """
+
+    def __init__(self, hub: BroadcastHub, broadcast: _Broadcast, subscriber: _Subscriber, catch_up: List[Dict[str, Any]]):
+        self._hub = hub
+        self._broadcast = broadcast
+        self._subscriber = subscriber
+        self._events = hub._consume(broadcast, subscriber, catch_up)
+
+    def __iter__(self) -> 'Subscription':
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        return next(self._events)
+
+    def close(self) -> None:
+        self._events.close()
+        self._hub._leave(self._broadcast, self._subscriber)
@@ -107,7 +107,7 @@ def buy_phase_flow(input_data: BuyPhaseInput) -> BuyPhaseOutput:
         for player in input_data.team.players
     ]
 
-    updated_team = input_data.team.copy(update={"players": updated_players})
+    updated_team = input_data.team.model_copy(update={"players": updated_players})
 
     return BuyPhaseOutput(updatedTeam=updated_team)
 
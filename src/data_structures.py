@@ -7,7 +7,7 @@ validadores e "plantas" para os dados carregados de arquivos JSON.
 """
 
 import random
-from typing import List, Optional, Literal, Union
+from typing import Dict, List, Optional, Literal, Union
 from pydantic import BaseModel, Field, conlist
 
 # --- Lógica de Apoio ---
@@ -30,9 +30,11 @@ def generate_stat(tier: Literal['S', 'A', 'B', 'C', 'D']) -> int:
 
 # --- Modelos de Dados (Schemas Pydantic) ---
 
-# Usado como placeholder
 class Loadout(BaseModel):
-    pass
+    primary: Optional[str] = None
+    secondary: str = 'classic'
+    shield: str = 'none'
+    abilities: bool = False
 
 class Titles(BaseModel):
     kickoff: int = 0
@@ -126,6 +128,7 @@ class MapResult(BaseModel):
     winner: Literal['A', 'B']
     scoreA: int
     scoreB: int
+    map: Optional[str] = None
 
 class MapResultWithPlayerStats(MapResult):
     teamAPlayers: List[PlayerWithMatchStats]
@@ -136,6 +139,7 @@ class SimulateSeriesInput(BaseModel):
     teamB: Team
     gamesToWin: int
     roundName: Optional[str] = None
+    maps: Optional[List[str]] = None  # Um mapa por jogo possível; sem a lista, todos os jogos usam 'ascent'
 
 class SimulateSeriesOutput(BaseModel):
     winner: Literal['A', 'B']
@@ -184,5 +188,10 @@ class PlayerStatsData(BaseModel):
     support: Literal['S', 'A', 'B', 'C', 'D']
     clutch: Literal['S', 'A', 'B', 'C', 'D']
 
+class MapModifiers(BaseModel):
+    # Bônus em % sobre a força de cada jogador, por lado e função, e bônus individuais de especialistas no mapa
+    roles: Dict[Literal['attack', 'defense'], Dict[str, float]] = Field(default_factory=dict)
+    players: Dict[str, float] = Field(default_factory=dict)
+
 # NOTA: O dicionário 'teams' com os dados brutos foi removido deste arquivo.
 # Ele agora reside em 'data/teams.json' e deve ser carregado separadamente.
\ No newline at end of file
@@ -0,0 +1,218 @@
+
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+from src.data_structures import SimulateSeriesOutput
+
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+
+
+class FixedBinHistogram:
+    """
+    Histogram with `bins` equal-width bins over [low, high), plus underflow/overflow counters.
+    Memory is fixed and two histograms with the same bins merge by adding counts.
+    Quantiles are resolved to the bin's lower edge, so unit-width bins over integers are exact.
+    """
+
+    def __init__(self, low: float, high: float, bins: int):
+        self.low = low
+        self.high = high
+        self.width = (high - low) / bins
+        self.counts = [0] * bins
+        self.underflow = 0
+        self.overflow = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float, weight: int = 1) -> None:
+        self.count += weight
+        self.total += value * weight
+        if value < self.low:
+            self.underflow += weight
+        elif value >= self.high:
+            self.overflow += weight
+        else:
+            self.counts[int((value - self.low) / self.width)] += weight
+
+    def merge(self, other: 'FixedBinHistogram') -> None:
+        if (self.low, self.high, len(self.counts)) != (other.low, other.high, len(other.counts)):
+            raise ValueError("Cannot merge histograms with different bins.")
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.count += other.count
+        self.total += other.total
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.underflow
+        if rank < seen:
+            return self.low
+        for i, c in enumerate(self.counts):
+            seen += c
+            if rank < seen:
+                return self.low + i * self.width
+        return self.high
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch): each non-negative value
+    is counted in a logarithmic bucket, so any quantile is within `relative_accuracy` of the
+    true value. If more than `max_buckets` are used, the lowest ones are collapsed together.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, weight: int = 1) -> None:
+        if value < 0:
+            raise ValueError("QuantileSketch only accepts non-negative values.")
+        self.count += weight
+        if value == 0:
+            self.zero_count += weight
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + weight
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        merged = sum(self.buckets.pop(k) for k in keys[:excess])
+        target = keys[excess]
+        self.buckets[target] += merged
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        if self.gamma != other.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy.")
+        for key, c in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + c
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+def _kill_histogram() -> FixedBinHistogram:
+    # One bin per kill/death count; more than 80 in a single map goes to overflow
+    return FixedBinHistogram(0, 81, 81)
+
+
+class PlayerDistribution:
+    def __init__(self):
+        self.kills = _kill_histogram()
+        self.deaths = _kill_histogram()
+        self.kd = QuantileSketch()
+
+    def add(self, kills: int, deaths: int) -> None:
+        self.kills.add(kills)
+        self.deaths.add(deaths)
+        self.kd.add(kills / max(1, deaths))
+
+    def merge(self, other: 'PlayerDistribution') -> None:
+        self.kills.merge(other.kills)
+        self.deaths.merge(other.deaths)
+        self.kd.merge(other.kd)
+
+    def report(self, quantiles: Iterable[float]) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            'maps': self.kills.count,
+            'meanKills': self.kills.mean(),
+            'meanDeaths': self.deaths.mean(),
+        }
+        for q in quantiles:
+            label = f"p{round(q * 100)}"
+            report[f"kills_{label}"] = self.kills.quantile(q)
+            report[f"deaths_{label}"] = self.deaths.quantile(q)
+            report[f"kd_{label}"] = self.kd.quantile(q)
+        return report
+
+
+class SeriesDistributions:
+    """
+    Online summary of many simulated series: series and map score histograms, overtime
+    frequency and per-player kill/death distributions. Memory depends on the number of
+    distinct scores and players, not on the number of series, and partial summaries built
+    in different processes can be merged.
+    """
+
+    def __init__(self):
+        self.series = 0
+        self.maps = 0
+        self.overtime_maps = 0
+        self.series_scores: Counter = Counter()
+        self.map_scores: Counter = Counter()
+        self.players: Dict[str, PlayerDistribution] = {}
+
+    def _player(self, name: str) -> PlayerDistribution:
+        player = self.players.get(name)
+        if player is None:
+            player = self.players[name] = PlayerDistribution()
+        return player
+
+    def add_series(self, result: SimulateSeriesOutput) -> None:
+        self.series += 1
+        self.series_scores[f"{result.teamAScore}-{result.teamBScore}"] += 1
+        for map_result in result.mapResults:
+            self.maps += 1
+            self.map_scores[f"{map_result.scoreA}-{map_result.scoreB}"] += 1
+            if map_result.scoreA + map_result.scoreB > 24:
+                self.overtime_maps += 1
+            for p in map_result.teamAPlayers:
+                self._player(p.name).add(p.stats.kills, p.stats.deaths)
+            for p in map_result.teamBPlayers:
+                self._player(p.name).add(p.stats.kills, p.stats.deaths)
+
+    def merge(self, other: 'SeriesDistributions') -> None:
+        self.series += other.series
+        self.maps += other.maps
+        self.overtime_maps += other.overtime_maps
+        self.series_scores.update(other.series_scores)
+        self.map_scores.update(other.map_scores)
+        for name, player in other.players.items():
+            self._player(name).merge(player)
+
+    def report(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        quantiles = list(quantiles)
+        series = max(1, self.series)
+        maps = max(1, self.maps)
+        return {
+            'series': self.series,
+            'maps': self.maps,
+            'overtimeRate': self.overtime_maps / maps,
+            'seriesScores': {score: count / series for score, count in sorted(self.series_scores.items())},
+            'mapScores': {
+                score: count / maps
+                for score, count in sorted(self.map_scores.items(), key=lambda item: (-item[1], item[0]))
+            },
+            'players': {name: player.report(quantiles) for name, player in sorted(self.players.items())},
+        }
+
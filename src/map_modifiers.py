@@ -0,0 +1,49 @@
+
+import json
+import os
+from typing import Dict, Literal, Optional
+
+from src.data_structures import MapModifiers, Player
+
+MAP_MODIFIERS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'map_modifiers.json'
+)
+
+_default_modifiers: Optional[Dict[str, MapModifiers]] = None
+
+
+def load_map_modifiers(path: str = MAP_MODIFIERS_PATH) -> Dict[str, MapModifiers]:
+    """
+    Loads and validates the per-map role and player modifiers. A missing file means no map bonuses.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    return {map_name: MapModifiers(**data) for map_name, data in raw.items()}
+
+
+def get_map_modifiers() -> Dict[str, MapModifiers]:
+    """Returns the default modifiers, loaded once per process."""
+    global _default_modifiers
+    if _default_modifiers is None:
+        _default_modifiers = load_map_modifiers()
+    return _default_modifiers
+
+
+def get_player_map_multiplier(
+    player: Player,
+    map_name: str,
+    side: Literal['attack', 'defense'],
+    modifiers: Dict[str, MapModifiers],
+) -> float:
+    """
+    Factor applied to the player's strength on this map and side. Role and player entries are
+    percentages, so the bonus grows with the player's rolled stats: a strong Initiator on a map
+    that favours Initiators helps more than a weak one. Unknown maps get no bonus.
+    """
+    map_modifiers = modifiers.get(map_name)
+    if map_modifiers is None:
+        return 1.0
+    percent = map_modifiers.roles.get(side, {}).get(player.role, 0.0) + map_modifiers.players.get(player.name, 0.0)
+    return 1.0 + percent / 100
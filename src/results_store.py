@@ -0,0 +1,522 @@
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.data_structures import SimulateSeriesOutput
+
+# Fixed-size little-endian records, so record i lives at offset i * size.
+# Every record keeps the position of the previous record of the same team / player / map,
+# and the last position of each is kept in a heads file: these chains are the secondary
+# indexes, walked newest first, so queries only touch the records they return.
+SERIES_RECORD = struct.Struct('<dIIBBBBBIIQIqq')
+# played_at, team_a, team_b, winner (0 = A), score_a, score_b, map_count, player_count,
+# first_map, first_player, payload_offset, payload_length, prev_of_team_a, prev_of_team_b
+MAP_RECORD = struct.Struct('<IIHHq')
+# series, map, score_a, score_b, prev_of_map
+PLAYER_RECORD = struct.Struct('<IIBHHq')
+# series, player, team (0 = A), kills, deaths, prev_of_player
+HEAD = struct.Struct('<q')
+# Every record type ends with its prev pointers, so they can be patched in place
+SERIES_PREVS = struct.Struct('<qq')
+SERIES_PREVS_OFFSET = SERIES_RECORD.size - SERIES_PREVS.size
+MAP_PREV_OFFSET = MAP_RECORD.size - HEAD.size
+PLAYER_PREV_OFFSET = PLAYER_RECORD.size - HEAD.size
+
+KINDS = ('teams', 'players', 'maps')
+NONE = -1
+REGULATION_ROUNDS = 24
+
+
+class _RecordFile:
+    """An append-only file of fixed-size records, read through a memory map that is re-mapped as it grows."""
+
+    def __init__(self, path: str, record: struct.Struct):
+        self.path = path
+        self.record = record
+        open(path, 'ab').close()
+        self._map: Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path) // self.record.size
+
+    def _ensure(self, index: int) -> mmap.mmap:
+        end = (index + 1) * self.record.size
+        current = self._map
+        if current is None or end > len(current):
+            # The old map is not closed: other threads may still be reading from it
+            with open(self.path, 'rb') as f:
+                current = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map = current
+            if end > len(current):
+                raise IndexError(f"Record {index} is not in {self.path}.")
+        return current
+
+    def get(self, index: int) -> tuple:
+        return self.record.unpack_from(self._ensure(index), index * self.record.size)
+
+    def truncate(self, count: int) -> bool:
+        """Cuts the file to `count` whole records; returns whether anything was removed."""
+        size = count * self.record.size
+        if os.path.getsize(self.path) <= size:
+            return False
+        os.truncate(self.path, size)
+        self._map = None  # Never read past the new end through an old map
+        return True
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class _FileLock:
+    """flock on the store's lock file: shared while loading the tables, exclusive while writing."""
+
+    def __init__(self, path: str, operation: int):
+        self.path = path
+        self.operation = operation
+
+    def __enter__(self) -> '_FileLock':
+        self._file = open(self.path, 'a')
+        fcntl.flock(self._file, self.operation)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+class ResultsStore:
+    """
+    Append-only store of simulated series, backed by memory-mapped files in `directory`.
+    Series, map and player rows are fixed-size records; the full output is kept as JSON
+    in a payload file for `get_series`. Team ids, player names and maps are interned
+    into small text tables.
+
+    One process appends at a time (guarded by a file lock). Other processes can read
+    at any moment and pick up new series on their next query.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.series = _RecordFile(os.path.join(directory, 'series.dat'), SERIES_RECORD)
+        self.maps = _RecordFile(os.path.join(directory, 'maps.dat'), MAP_RECORD)
+        self.players = _RecordFile(os.path.join(directory, 'players.dat'), PLAYER_RECORD)
+        self._payload_path = os.path.join(directory, 'payload.ndjson')
+        open(self._payload_path, 'ab').close()
+        self._lock = threading.RLock()
+        self._names: Dict[str, List[str]] = {}
+        self._ids: Dict[str, Dict[str, int]] = {}
+        self._heads: Dict[str, List[int]] = {}
+        self._indexed = 0  # Series covered by the heads files; the ones after it are relinked on the next write
+        self._seen_series = -1
+        self._refresh()
+
+    # --- Name tables and heads ---
+
+    def _table_path(self, kind: str) -> str:
+        return os.path.join(self.directory, f"{kind}.txt")
+
+    def _heads_path(self, kind: str) -> str:
+        return os.path.join(self.directory, f"{kind}.heads")
+
+    def _indexed_path(self) -> str:
+        return os.path.join(self.directory, 'indexed')
+
+    def _file_lock(self, operation: int) -> _FileLock:
+        return _FileLock(os.path.join(self.directory, 'lock'), operation)
+
+    def _refresh(self) -> None:
+        """Reloads names and heads if another process appended since the last look."""
+        with self._lock:
+            if len(self.series) == self._seen_series:
+                return
+            with self._file_lock(fcntl.LOCK_SH):
+                self._load_tables()
+
+    def _load_tables(self) -> None:
+        count = len(self.series)
+        for kind in KINDS:
+            path = self._table_path(kind)
+            open(path, 'a', encoding='utf-8').close()
+            with open(path, 'r', encoding='utf-8') as f:
+                names = f.read().splitlines()
+            heads_path = self._heads_path(kind)
+            open(heads_path, 'ab').close()
+            with open(heads_path, 'rb') as f:
+                data = f.read()
+            heads = [h for (h,) in HEAD.iter_unpack(data[:len(data) // HEAD.size * HEAD.size])]
+            heads += [NONE] * (len(names) - len(heads))
+            self._names[kind] = names
+            self._ids[kind] = {name: i for i, name in enumerate(names)}
+            self._heads[kind] = heads
+        # Stores written before the count existed are relinked in full once
+        with open(self._indexed_path(), 'ab+') as f:
+            f.seek(0)
+            data = f.read(HEAD.size)
+        self._indexed = HEAD.unpack(data)[0] if len(data) == HEAD.size else 0
+        self._seen_series = count
+
+    def _intern(self, kind: str, name: str) -> int:
+        ids = self._ids[kind]
+        if name not in ids:
+            with open(self._table_path(kind), 'a', encoding='utf-8') as f:
+                f.write(name + '\n')
+            ids[name] = len(self._names[kind])
+            self._names[kind].append(name)
+            self._heads[kind].append(NONE)
+        return ids[name]
+
+    def _lookup(self, kind: str, name: str) -> Optional[int]:
+        self._refresh()
+        return self._ids[kind].get(name)
+
+    # --- Writing ---
+
+    def append(
+        self,
+        team_a_id: str,
+        team_b_id: str,
+        result: Union[SimulateSeriesOutput, Dict[str, Any]],
+        played_at: Optional[float] = None,
+    ) -> int:
+        """Stores one series and returns its number."""
+        return self.append_many([(team_a_id, team_b_id, result)], played_at)[0]
+
+    def append_many(
+        self,
+        results: List[Tuple[str, str, Union[SimulateSeriesOutput, Dict[str, Any]]]],
+        played_at: Optional[float] = None,
+    ) -> List[int]:
+        """
+        Stores several series under a single lock. Series are kept in append order, and
+        `played_at` (default: now) is the date used by range queries; it cannot be older
+        than the last stored series.
+        """
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._load_tables()
+            self._repair_tail()
+            if self._indexed != len(self.series):
+                # An append died before its heads were written: link its series into the chains first
+                self._relink(min(self._indexed, len(self.series)))
+            try:
+                return self._append_locked(results, played_at)
+            except BaseException:
+                self._seen_series = -1  # In-memory heads may be ahead of the files; reload on next read
+                raise
+
+    def _append_locked(self, results, played_at: Optional[float]) -> List[int]:
+        series_no = len(self.series)
+        # Index walks stop at the first series older than `since`, so dates must never go back
+        last_played_at = self.series.get(series_no - 1)[0] if series_no else float('-inf')
+        if played_at is None:
+            played_at = max(time.time(), last_played_at)
+        elif played_at < last_played_at:
+            raise ValueError("played_at is older than the last stored series; the store is append-only in time.")
+        map_no = len(self.maps)
+        player_no = len(self.players)
+        heads = self._heads
+        dirty: Dict[str, set] = {kind: set() for kind in KINDS}
+        series_rows, map_rows, player_rows = [], [], []
+        numbers = []
+
+        with open(self._payload_path, 'ab') as payload:
+            for team_a_id, team_b_id, result in results:
+                data = result.model_dump() if isinstance(result, SimulateSeriesOutput) else result
+                encoded = json.dumps(data, separators=(',', ':')).encode('utf-8') + b'\n'
+                offset = payload.tell()
+                payload.write(encoded)
+
+                team_a = self._intern('teams', team_a_id)
+                team_b = self._intern('teams', team_b_id)
+                first_map, first_player = map_no, player_no
+
+                for map_result in data['mapResults']:
+                    map_id = self._intern('maps', map_result.get('map') or '')
+                    map_rows.append(MAP_RECORD.pack(
+                        series_no, map_id, map_result['scoreA'], map_result['scoreB'], heads['maps'][map_id],
+                    ))
+                    heads['maps'][map_id] = map_no
+                    dirty['maps'].add(map_id)
+                    map_no += 1
+
+                for side, key in ((0, 'teamA'), (1, 'teamB')):
+                    for p in data[key]['players']:
+                        player = self._intern('players', p['name'])
+                        player_rows.append(PLAYER_RECORD.pack(
+                            series_no, player, side, p['stats']['kills'], p['stats']['deaths'],
+                            heads['players'][player],
+                        ))
+                        heads['players'][player] = player_no
+                        dirty['players'].add(player)
+                        player_no += 1
+
+                series_rows.append(SERIES_RECORD.pack(
+                    played_at, team_a, team_b, 0 if data['winner'] == 'A' else 1,
+                    data['teamAScore'], data['teamBScore'], len(data['mapResults']), player_no - first_player,
+                    first_map, first_player, offset, len(encoded),
+                    heads['teams'][team_a], heads['teams'][team_b],
+                ))
+                heads['teams'][team_a] = heads['teams'][team_b] = series_no
+                dirty['teams'].update((team_a, team_b))
+                numbers.append(series_no)
+                series_no += 1
+
+        # Rows first and the series records last, so a crash never leaves a series without its rows
+        for record_file, rows in ((self.maps, map_rows), (self.players, player_rows), (self.series, series_rows)):
+            with open(record_file.path, 'ab') as f:
+                f.write(b''.join(rows))
+        for kind, ids in dirty.items():
+            self._write_heads(kind, ids)
+        self._write_indexed(series_no)
+        self._seen_series = series_no
+        return numbers
+
+    def _write_indexed(self, count: int) -> None:
+        with open(self._indexed_path(), 'r+b') as f:
+            f.write(HEAD.pack(count))
+        self._indexed = count
+
+    def _write_heads(self, kind: str, ids) -> None:
+        heads = self._heads[kind]
+        with open(self._heads_path(kind), 'r+b') as f:
+            size = os.fstat(f.fileno()).st_size // HEAD.size
+            if size < len(heads):
+                f.seek(size * HEAD.size)
+                f.write(HEAD.pack(NONE) * (len(heads) - size))
+            for i in ids:
+                f.seek(i * HEAD.size)
+                f.write(HEAD.pack(heads[i]))
+
+    def rebuild_indexes(self) -> None:
+        """
+        Rebuilds every chain pointer and the heads files from the records, e.g. after a crash
+        in the middle of an append. Rows written without their series record are dropped.
+        """
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._load_tables()
+            self._repair_tail()
+            self._relink(0)
+
+    def _repair_tail(self) -> bool:
+        """
+        Cuts what an interrupted append left behind: partial records at the end of each file and
+        map/player rows (and payload bytes) after the last complete series. Must hold the EX lock.
+        Returns whether anything was cut.
+        """
+        repaired = False
+        for record_file in (self.series, self.maps, self.players):
+            repaired |= record_file.truncate(len(record_file))
+        count = len(self.series)
+        if count:
+            last = self.series.get(count - 1)
+            map_end, player_end, payload_end = last[8] + last[6], last[9] + last[7], last[10] + last[11]
+        else:
+            map_end = player_end = payload_end = 0
+        repaired |= self.maps.truncate(map_end)
+        repaired |= self.players.truncate(player_end)
+        if os.path.getsize(self._payload_path) > payload_end:
+            os.truncate(self._payload_path, payload_end)
+            repaired = True
+        return repaired
+
+    def _relink(self, start: int) -> None:
+        """
+        Rewrites the prev pointers of series `start` onwards (and of their map and player rows)
+        from the records before them, then writes every head and the indexed count.
+        Heads files are not trusted past `start`, since the crash may have hit while writing them.
+        Must hold the EX lock.
+        """
+        heads = {kind: [NONE] * len(self._names[kind]) for kind in KINDS}
+        if start:
+            last = self.series.get(start - 1)
+            map_start, player_start = last[8] + last[6], last[9] + last[7]
+        else:
+            map_start = player_start = 0
+        for n in range(start):
+            row = self.series.get(n)
+            heads['teams'][row[1]] = heads['teams'][row[2]] = n
+        for i in range(map_start):
+            heads['maps'][self.maps.get(i)[1]] = i
+        for i in range(player_start):
+            heads['players'][self.players.get(i)[1]] = i
+
+        with open(self.series.path, 'r+b') as series_file, open(self.maps.path, 'r+b') as maps_file, \
+                open(self.players.path, 'r+b') as players_file:
+            for n in range(start, len(self.series)):
+                row = self.series.get(n)
+                for i in range(row[8], row[8] + row[6]):
+                    map_id = self.maps.get(i)[1]
+                    maps_file.seek(i * MAP_RECORD.size + MAP_PREV_OFFSET)
+                    maps_file.write(HEAD.pack(heads['maps'][map_id]))
+                    heads['maps'][map_id] = i
+                for i in range(row[9], row[9] + row[7]):
+                    player = self.players.get(i)[1]
+                    players_file.seek(i * PLAYER_RECORD.size + PLAYER_PREV_OFFSET)
+                    players_file.write(HEAD.pack(heads['players'][player]))
+                    heads['players'][player] = i
+                series_file.seek(n * SERIES_RECORD.size + SERIES_PREVS_OFFSET)
+                series_file.write(SERIES_PREVS.pack(heads['teams'][row[1]], heads['teams'][row[2]]))
+                heads['teams'][row[1]] = heads['teams'][row[2]] = n
+
+        for kind in KINDS:
+            self._heads[kind] = heads[kind]
+            with open(self._heads_path(kind), 'wb') as f:
+                f.write(b''.join(HEAD.pack(h) for h in heads[kind]))
+        self._write_indexed(len(self.series))
+
+    # --- Reading ---
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def get_series(self, series_no: int) -> Dict[str, Any]:
+        """The full stored output of one series."""
+        row = self.series.get(series_no)
+        with open(self._payload_path, 'rb') as f:
+            f.seek(row[10])
+            return json.loads(f.read(row[11]))
+
+    def _team_series(self, team: int, since: Optional[float], until: Optional[float]) -> Iterator[tuple]:
+        n = self._heads['teams'][team]
+        while n != NONE:
+            row = self.series.get(n)
+            if since is not None and row[0] < since:
+                return
+            if until is None or row[0] <= until:
+                yield row
+            n = row[12] if row[1] == team else row[13]
+
+    def _all_series(self, since: Optional[float], until: Optional[float]) -> Iterator[tuple]:
+        for n in range(len(self.series) - 1, -1, -1):
+            row = self.series.get(n)
+            if since is not None and row[0] < since:
+                return
+            if until is None or row[0] <= until:
+                yield row
+
+    def _map_chain(self, map_id: int, since: Optional[float], until: Optional[float]) -> Iterator[tuple]:
+        n = self._heads['maps'][map_id]
+        while n != NONE:
+            map_row = self.maps.get(n)
+            played_at = self.series.get(map_row[0])[0]
+            if since is not None and played_at < since:
+                return
+            if until is None or played_at <= until:
+                yield map_row
+            n = map_row[4]
+
+    def _series_maps(self, row: tuple, map_id: Optional[int]) -> Iterator[tuple]:
+        for i in range(row[8], row[8] + row[6]):
+            map_row = self.maps.get(i)
+            if map_id is None or map_row[1] == map_id:
+                yield map_row
+
+    def head_to_head(
+        self,
+        team_x: str,
+        team_y: str,
+        map_name: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Series and map record between two teams, optionally on one map and inside a date range."""
+        x, y = self._lookup('teams', team_x), self._lookup('teams', team_y)
+        map_id = self._lookup('maps', map_name) if map_name else None
+        report = {
+            'teamA': team_x,
+            'teamB': team_y,
+            'map': map_name,
+            'series': 0,
+            'seriesWins': {team_x: 0, team_y: 0},
+            'mapWins': {team_x: 0, team_y: 0},
+        }
+        if x is None or y is None or (map_name and map_id is None):
+            return report
+        for row in self._team_series(x, since, until):
+            if {row[1], row[2]} != {x, y}:
+                continue
+            x_is_a = row[1] == x
+            played = list(self._series_maps(row, map_id))
+            if map_name and not played:
+                continue
+            report['series'] += 1
+            report['seriesWins'][team_x if (row[3] == 0) == x_is_a else team_y] += 1
+            for map_row in played:
+                a_won = map_row[2] > map_row[3]
+                report['mapWins'][team_x if a_won == x_is_a else team_y] += 1
+        return report
+
+    def player_kd(
+        self,
+        player_name: str,
+        last: int = 10,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Kills, deaths and K/D of a player over their last `last` stored series."""
+        player = self._lookup('players', player_name)
+        kills = deaths = series = 0
+        n = self._heads['players'][player] if player is not None else NONE
+        while n != NONE and series < last:
+            row = self.players.get(n)
+            played_at = self.series.get(row[0])[0]
+            if since is not None and played_at < since:
+                break
+            if until is None or played_at <= until:
+                kills += row[3]
+                deaths += row[4]
+                series += 1
+            n = row[5]
+        return {
+            'player': player_name,
+            'series': series,
+            'kills': kills,
+            'deaths': deaths,
+            'kd': kills / deaths if deaths else None,
+        }
+
+    def overtime_rate(
+        self,
+        team: Optional[str] = None,
+        map_name: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Share of maps that went to overtime, for one team and/or one map. Without either,
+        every stored map in the date range is read.
+        """
+        team_id = self._lookup('teams', team) if team else None
+        map_id = self._lookup('maps', map_name) if map_name else None
+        if (team and team_id is None) or (map_name and map_id is None):
+            map_rows: Iterator[tuple] = iter(())
+        elif team_id is not None:
+            map_rows = (m for row in self._team_series(team_id, since, until) for m in self._series_maps(row, map_id))
+        elif map_id is not None:
+            map_rows = self._map_chain(map_id, since, until)
+        else:
+            map_rows = (m for row in self._all_series(since, until) for m in self._series_maps(row, None))
+
+        maps = overtime = 0
+        for map_row in map_rows:
+            maps += 1
+            overtime += map_row[2] + map_row[3] > REGULATION_ROUNDS
+        return {
+            'team': team,
+            'map': map_name,
+            'maps': maps,
+            'overtimeMaps': overtime,
+            'overtimeRate': overtime / maps if maps else None,
+        }
+
+    def close(self) -> None:
+        for record_file in (self.series, self.maps, self.players):
+            record_file.close()
@@ -0,0 +1,106 @@
+
+import math
+import random
+from typing import Dict, List, Optional, Union
+
+from src.data_structures import Player, PlayerStats, PlayerStatsData, Team, TeamData, potential_tiers
+
+ROLLED_STATS = ('aim', 'support', 'clutch')
+
+
+def _tier_table(tier: str) -> bytes:
+    # Maps a random byte to a stat in the tier's range; each value gets 25 or 26 of the 256 bytes
+    min_val, max_val = potential_tiers[tier]
+    width = max_val - min_val + 1
+    return bytes(min_val + (b * width) // 256 for b in range(256))
+
+
+TIER_TABLES: Dict[str, bytes] = {tier: _tier_table(tier) for tier in potential_tiers}
+
+
+class RosterRealizations:
+    """
+    K realizations of every player's rolled stats, stored as one bytearray per stat in
+    player-major order: player i's K values for a stat are `values[stat][i * K:(i + 1) * K]`.
+    Batch engines can read a player's column directly or build a match-ready Team for one realization.
+    """
+
+    def __init__(self, player_stats: Dict[str, PlayerStatsData], k: int):
+        self.k = k
+        self.names: List[str] = list(player_stats)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.hs: Dict[str, int] = {name: data.hs for name, data in player_stats.items()}
+        self.values: Dict[str, bytearray] = {stat: bytearray(len(self.names) * k) for stat in ROLLED_STATS}
+
+    def column(self, name: str, stat: str) -> memoryview:
+        """All K values of one stat for one player, without copying."""
+        start = self.index[name] * self.k
+        return memoryview(self.values[stat])[start:start + self.k]
+
+    def team(self, team_data: TeamData, realization: int) -> Team:
+        """Same as build_team, with the stats taken from one realization instead of rolled."""
+        players = []
+        for p in team_data.players:
+            offset = self.index[p.name] * self.k + realization
+            players.append(
+                Player(
+                    name=p.name,
+                    role=p.role,
+                    nationality=p.nationality,
+                    age=p.age,
+                    photo=p.photo,
+                    stats=PlayerStats(
+                        aim=self.values['aim'][offset],
+                        hs=self.hs[p.name],
+                        support=self.values['support'][offset],
+                        clutch=self.values['clutch'][offset],
+                    ),
+                    alive=True,
+                )
+            )
+        return Team(name=team_data.name, players=players)
+
+
+def sample_realizations(
+    player_stats: Dict[str, PlayerStatsData],
+    k: int,
+    correlation: float = 0.0,
+    seed: Optional[Union[int, str]] = None,
+) -> RosterRealizations:
+    """
+    Draws K roster realizations for every player at once. Random bytes are generated in bulk
+    and mapped to each player's tier range with one `bytes.translate` per player and stat,
+    so there is no Python call per stat per realization.
+
+    With `correlation` > 0, each stat reuses a draw shared by the player's three stats with
+    probability sqrt(correlation), so a player who rolls high tends to roll high everywhere
+    (pairwise rank correlation between stats equal to `correlation`) while every stat keeps
+    its tier distribution.
+    """
+    if not 0.0 <= correlation <= 1.0:
+        raise ValueError("correlation must be between 0 and 1.")
+    rng = random.Random(seed)
+    realizations = RosterRealizations(player_stats, k)
+    n = len(realizations.names) * k
+    if n == 0:
+        return realizations
+
+    def random_bytes() -> bytes:
+        return rng.getrandbits(8 * n).to_bytes(n, 'little')
+
+    if correlation > 0:
+        shared = int.from_bytes(random_bytes(), 'little')
+        threshold = round(math.sqrt(correlation) * 256)
+        use_shared = bytes(0xFF if b < threshold else 0x00 for b in range(256))
+
+    for stat in ROLLED_STATS:
+        draws = random_bytes()
+        if correlation > 0:
+            # Byte-wise select between the shared and the stat's own draw, done on whole integers
+            mask = int.from_bytes(random_bytes().translate(use_shared), 'little')
+            draws = ((shared & mask) | (int.from_bytes(draws, 'little') & ~mask)).to_bytes(n, 'little')
+        values = realizations.values[stat]
+        for i, name in enumerate(realizations.names):
+            start = i * k
+            values[start:start + k] = draws[start:start + k].translate(TIER_TABLES[getattr(player_stats[name], stat)])
+    return realizations
@@ -0,0 +1,282 @@
+
+import itertools
+import multiprocessing
+import random
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.data_structures import PlayerStatsData, Team, TeamData
+from src.roster_sampler import RosterRealizations, sample_realizations
+from src.simulate_series_flow import DEFAULT_MAP
+from src.simulate_series_stream_flow import DATA_DIR, build_team, load_match_data
+from src.simulate_tactical_match_flow import compile_strength_index, run_probabilistic_map_sim
+
+REGIONS = ('Americas', 'EMEA', 'Pacific', 'China')
+DEFAULT_QUALIFYING_SPOTS = 3
+# Roster realizations are sampled in fixed blocks of replicas, each with its own seed
+REALIZATION_BLOCK = 64
+
+
+def schedule_round_robin(team_ids: List[str]) -> List[List[Tuple[str, str]]]:
+    """
+    Single round robin using the circle method: returns matchdays, each a list of fixtures,
+    so that every pair of teams meets exactly once.
+    """
+    teams: List[Optional[str]] = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)  # Bye
+    n = len(teams)
+    matchdays = []
+    for _ in range(n - 1):
+        fixtures = [
+            (teams[i], teams[n - 1 - i])
+            for i in range(n // 2)
+            if teams[i] is not None and teams[n - 1 - i] is not None
+        ]
+        matchdays.append(fixtures)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return matchdays
+
+
+class StandingsRow:
+    __slots__ = ('team_id', 'wins', 'losses', 'maps_won', 'maps_lost', 'rounds_won', 'rounds_lost', 'beaten', 'draw')
+
+    def __init__(self, team_id: str, draw: float):
+        self.team_id = team_id
+        self.wins = 0
+        self.losses = 0
+        self.maps_won = 0
+        self.maps_lost = 0
+        self.rounds_won = 0
+        self.rounds_lost = 0
+        self.beaten: List[str] = []
+        self.draw = draw  # Seeded random draw, the last tiebreaker
+
+    def sort_key(self) -> Tuple[int, int, int]:
+        return (self.wins, self.maps_won - self.maps_lost, self.rounds_won - self.rounds_lost)
+
+    def tiebreak_key(self, tied_ids: Set[str]) -> Tuple[int, float]:
+        """Among teams with the same sort_key: series won against each other, then the draw."""
+        return (sum(1 for team_id in self.beaten if team_id in tied_ids), self.draw)
+
+
+class LeagueStandings:
+    """
+    League table updated in place after every series. Tiebreakers are map differential,
+    round differential, head-to-head results among the tied teams, then a random draw
+    taken from `rng` (so it is reproducible when the stream is seeded).
+    """
+
+    def __init__(self, team_ids: List[str], rng=random):
+        self.rows: Dict[str, StandingsRow] = {team_id: StandingsRow(team_id, rng.random()) for team_id in team_ids}
+
+    def record(self, team_a_id: str, team_b_id: str, map_scores: List[Tuple[int, int]]) -> None:
+        """Records one series from its (team A rounds, team B rounds) score on each map played."""
+        row_a, row_b = self.rows[team_a_id], self.rows[team_b_id]
+        maps_a = sum(1 for score_a, score_b in map_scores if score_a > score_b)
+        maps_b = len(map_scores) - maps_a
+        if maps_a > maps_b:
+            row_a.wins += 1
+            row_b.losses += 1
+            row_a.beaten.append(team_b_id)
+        else:
+            row_b.wins += 1
+            row_a.losses += 1
+            row_b.beaten.append(team_a_id)
+        row_a.maps_won += maps_a
+        row_a.maps_lost += maps_b
+        row_b.maps_won += maps_b
+        row_b.maps_lost += maps_a
+        for score_a, score_b in map_scores:
+            row_a.rounds_won += score_a
+            row_a.rounds_lost += score_b
+            row_b.rounds_won += score_b
+            row_b.rounds_lost += score_a
+
+    def ranking(self) -> List[StandingsRow]:
+        rows = sorted(self.rows.values(), key=StandingsRow.sort_key, reverse=True)
+        ranked: List[StandingsRow] = []
+        for _, group in itertools.groupby(rows, key=StandingsRow.sort_key):
+            tied = list(group)
+            if len(tied) > 1:
+                tied_ids = {row.team_id for row in tied}
+                tied.sort(key=lambda row: row.tiebreak_key(tied_ids), reverse=True)
+            ranked.extend(tied)
+        return ranked
+
+
+def group_by_region(teams: Dict[str, TeamData], regions=REGIONS) -> Dict[str, List[str]]:
+    leagues: Dict[str, List[str]] = {region: [] for region in regions}
+    for team_id, team in teams.items():
+        if team.region in leagues:
+            leagues[team.region].append(team_id)
+    return leagues
+
+
+def simulate_league_season(
+    team_ids: List[str],
+    teams: Dict[str, TeamData],
+    player_stats: Dict[str, PlayerStatsData],
+    games_to_win: int = 2,
+    rosters: Optional[Dict[str, Team]] = None,
+    rng=random,
+) -> LeagueStandings:
+    """
+    Plays every fixture of one league season, map by map, on the default map.
+    Each team's stats are rolled once per season, so a replica is one plausible version of every roster.
+    Pre-built `rosters` (e.g. from a RosterRealizations) skip the rolling.
+    Standings only need map and round scores, so player stats are never generated and each
+    team's strength is compiled once for the whole season.
+    """
+    if rosters is None:
+        rosters = {team_id: build_team(teams[team_id], player_stats) for team_id in team_ids}
+    index = compile_strength_index({team_id: rosters[team_id] for team_id in team_ids}, [DEFAULT_MAP])
+    strengths = {
+        team_id: {side: index[(team_id, DEFAULT_MAP, side)] for side in ('attack', 'defense')}
+        for team_id in team_ids
+    }
+    standings = LeagueStandings(team_ids, rng)
+    for matchday in schedule_round_robin(team_ids):
+        for team_a_id, team_b_id in matchday:
+            map_scores: List[Tuple[int, int]] = []
+            wins = {'A': 0, 'B': 0}
+            while wins['A'] < games_to_win and wins['B'] < games_to_win:
+                result = run_probabilistic_map_sim(
+                    rosters[team_a_id], rosters[team_b_id], strengths[team_a_id], strengths[team_b_id],
+                    rng=rng, with_player_stats=False,
+                )
+                wins[result.winner] += 1
+                map_scores.append((result.scoreA, result.scoreB))
+            standings.record(team_a_id, team_b_id, map_scores)
+    return standings
+
+
+class SeasonTally:
+    """
+    Mergeable counts over many season replicas: finishing positions plus summed wins and differentials.
+    """
+
+    def __init__(self, leagues: Dict[str, List[str]]):
+        self.leagues = leagues
+        self.replicas = 0
+        self.positions = {
+            team_id: [0] * len(team_ids) for team_ids in leagues.values() for team_id in team_ids
+        }
+        self.wins = {team_id: 0 for team_id in self.positions}
+        self.map_diff = {team_id: 0 for team_id in self.positions}
+
+    def add(self, standings_by_region: Dict[str, LeagueStandings]) -> None:
+        self.replicas += 1
+        for standings in standings_by_region.values():
+            for position, row in enumerate(standings.ranking()):
+                self.positions[row.team_id][position] += 1
+                self.wins[row.team_id] += row.wins
+                self.map_diff[row.team_id] += row.maps_won - row.maps_lost
+
+    def merge(self, other: 'SeasonTally') -> None:
+        self.replicas += other.replicas
+        for team_id, counts in other.positions.items():
+            mine = self.positions[team_id]
+            for position, count in enumerate(counts):
+                mine[position] += count
+            self.wins[team_id] += other.wins[team_id]
+            self.map_diff[team_id] += other.map_diff[team_id]
+
+    def report(self, qualifying_spots: int) -> Dict[str, Any]:
+        n = max(1, self.replicas)
+        leagues = {}
+        for region, team_ids in self.leagues.items():
+            rows = []
+            for team_id in team_ids:
+                counts = self.positions[team_id]
+                rows.append({
+                    'team': team_id,
+                    'qualifyProbability': sum(counts[:qualifying_spots]) / n,
+                    'positionProbabilities': [count / n for count in counts],
+                    'averageWins': self.wins[team_id] / n,
+                    'averageMapDiff': self.map_diff[team_id] / n,
+                })
+            rows.sort(key=lambda row: row['qualifyProbability'], reverse=True)
+            leagues[region] = rows
+        return {'replicas': self.replicas, 'qualifyingSpots': qualifying_spots, 'leagues': leagues}
+
+
+def run_season_replicas(
+    replica_ids: range,
+    teams: Dict[str, TeamData],
+    player_stats: Dict[str, PlayerStatsData],
+    regions=REGIONS,
+    games_to_win: int = 2,
+    seed: Optional[int] = None,
+    progress: Optional[Callable[[float], None]] = None,
+    stat_correlation: float = 0.0,
+) -> SeasonTally:
+    """
+    Runs the given replicas of every regional league. With a seed, replica i is always seeded
+    the same way, so results do not depend on how replicas are split across processes.
+    Rosters come from bulk-sampled realizations (see sample_realizations), with the given
+    correlation between each player's stats.
+    """
+    leagues = group_by_region(teams, regions)
+    tally = SeasonTally(leagues)
+    block_id: Optional[int] = None
+    realizations: Optional[RosterRealizations] = None
+    for done, replica in enumerate(replica_ids, start=1):
+        if replica // REALIZATION_BLOCK != block_id:
+            block_id = replica // REALIZATION_BLOCK
+            realizations = sample_realizations(
+                player_stats, REALIZATION_BLOCK, stat_correlation,
+                seed=None if seed is None else f"rosters:{seed}:{block_id}",
+            )
+        if seed is not None:
+            random.seed(seed * 1_000_003 + replica)
+        row = replica % REALIZATION_BLOCK
+        tally.add({
+            region: simulate_league_season(
+                team_ids, teams, player_stats, games_to_win,
+                rosters={team_id: realizations.team(teams[team_id], row) for team_id in team_ids},
+            )
+            for region, team_ids in leagues.items()
+        })
+        if progress:
+            progress(done / len(replica_ids))
+    return tally
+
+
+def _run_chunk(args: Tuple[range, str, Tuple[str, ...], int, Optional[int], float]) -> SeasonTally:
+    replica_ids, data_dir, regions, games_to_win, seed, stat_correlation = args
+    teams, player_stats = load_match_data(data_dir)
+    return run_season_replicas(
+        replica_ids, teams, player_stats, regions, games_to_win, seed, stat_correlation=stat_correlation
+    )
+
+
+def forecast_league_seasons(
+    replicas: int,
+    processes: int = 1,
+    regions=REGIONS,
+    games_to_win: int = 2,
+    qualifying_spots: int = DEFAULT_QUALIFYING_SPOTS,
+    seed: Optional[int] = None,
+    data_dir: str = DATA_DIR,
+    stat_correlation: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Simulates `replicas` seasons of every regional league, split across `processes`, and returns
+    each team's qualification probability and finishing-position distribution.
+    """
+    processes = max(1, min(processes, replicas))
+    bounds = [replicas * i // processes for i in range(processes + 1)]
+    chunks = [
+        (range(bounds[i], bounds[i + 1]), data_dir, tuple(regions), games_to_win, seed, stat_correlation)
+        for i in range(processes)
+    ]
+    if processes == 1:
+        tallies = [_run_chunk(chunks[0])]
+    else:
+        with multiprocessing.get_context('spawn').Pool(processes) as pool:
+            tallies = pool.map(_run_chunk, chunks)
+
+    total = tallies[0]
+    for tally in tallies[1:]:
+        total.merge(tally)
+    return total.report(qualifying_spots)
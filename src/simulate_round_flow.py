@@ -119,9 +119,7 @@ def run_round_simulation(input_data: SimulateRoundInput) -> SimulateRoundOutput:
         else:
             alive_b = [p for p in alive_b if p.name != loser.name]
 
-    return SimulateRoundOutput(
-        winner="teamA" if alive_a else "teamB", killFeed=kill_feed
-    )
+    return SimulateRoundOutput(winner="teamA" if alive_a else "teamB", killFeed=kill_feed)
 
 
 def simulate_round(input_data: SimulateRoundInput) -> SimulateRoundOutput:
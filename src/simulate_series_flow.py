@@ -9,9 +9,12 @@ from src.data_structures import (
     PlayerWithMatchStats,
     Team,
     Player,
-    PlayerSeriesStats
+    PlayerSeriesStats,
+    PlayerMatchStats,
 )
-from src.simulate_tactical_match_flow import simulate_tactical_match, TacticalMatchInputSchema
+from src.simulate_tactical_match_flow import compile_strength_index, simulate_tactical_match, TacticalMatchInputSchema
+
+DEFAULT_MAP = 'ascent'  # Used for every game when the input has no map list
 
 
 def simulate_series(input_data: SimulateSeriesInput) -> SimulateSeriesOutput:
@@ -27,39 +30,47 @@ def simulate_series(input_data: SimulateSeriesInput) -> SimulateSeriesOutput:
     is_grand_final = 'grand final' in round_name.lower()
     games_to_win = 3 if is_lower_final or is_grand_final else input_data.gamesToWin
     max_games = (games_to_win * 2) - 1
+    maps = input_data.maps or [DEFAULT_MAP] * max_games
+    if len(maps) < max_games:
+        raise ValueError(f"Series needs {max_games} maps, got {len(maps)}.")
 
     # Initialize players with series stats
     team_a_players_series: List[PlayerWithSeriesStats] = [
         PlayerWithSeriesStats(
-            **p.model_dump(),
-            stats=PlayerSeriesStats(**p.stats.model_dump(), kills=0, deaths=0)
+            **{**p.__dict__, 'stats': PlayerSeriesStats(**p.stats.__dict__, kills=0, deaths=0)},
         ) for p in input_data.teamA.players
     ]
     team_b_players_series: List[PlayerWithSeriesStats] = [
         PlayerWithSeriesStats(
-            **p.model_dump(),
-            stats=PlayerSeriesStats(**p.stats.model_dump(), kills=0, deaths=0)
+            **{**p.__dict__, 'stats': PlayerSeriesStats(**p.stats.__dict__, kills=0, deaths=0)},
         ) for p in input_data.teamB.players
     ]
 
-    for _ in range(max_games):
+    # Strengths for every requested map and side, computed once for the whole series
+    strength_index = compile_strength_index(
+        {'A': input_data.teamA, 'B': input_data.teamB}, maps[:max_games]
+    )
+
+    for map_name in maps[:max_games]:
         tactical_input = TacticalMatchInputSchema(
             teamA=input_data.teamA,
             teamB=input_data.teamB,
-            map='ascent', # Placeholder
+            map=map_name,
             offensivePlay='Default' # Placeholder
         )
-        match_result = simulate_tactical_match(tactical_input)
+        match_result = simulate_tactical_match(tactical_input, strength_index)
 
         # Map tactical match stats back to full player objects for the map result
         team_a_players_map = [
             PlayerWithMatchStats(
-                **base_player.model_dump(),
-                stats={
-                    **base_player.stats.model_dump(),
-                    'kills': p_map.kills,
-                    'deaths': p_map.deaths,
-                }
+                **{
+                    **base_player.__dict__,
+                    'stats': PlayerMatchStats(
+                        **base_player.stats.__dict__,
+                        kills=p_map.kills,
+                        deaths=p_map.deaths,
+                    ),
+                },
             )
             for base_player in input_data.teamA.players
             for p_map in match_result.teamAStats if p_map.name == base_player.name
@@ -67,12 +78,14 @@ def simulate_series(input_data: SimulateSeriesInput) -> SimulateSeriesOutput:
         
         team_b_players_map = [
             PlayerWithMatchStats(
-                **base_player.model_dump(),
-                stats={
-                    **base_player.stats.model_dump(),
-                    'kills': p_map.kills,
-                    'deaths': p_map.deaths,
-                }
+                **{
+                    **base_player.__dict__,
+                    'stats': PlayerMatchStats(
+                        **base_player.stats.__dict__,
+                        kills=p_map.kills,
+                        deaths=p_map.deaths,
+                    ),
+                },
             )
             for base_player in input_data.teamB.players
             for p_map in match_result.teamBStats if p_map.name == base_player.name
@@ -83,6 +96,7 @@ def simulate_series(input_data: SimulateSeriesInput) -> SimulateSeriesOutput:
                 winner=match_result.winner,
                 scoreA=match_result.scoreA,
                 scoreB=match_result.scoreB,
+                map=map_name,
                 teamAPlayers=team_a_players_map,
                 teamBPlayers=team_b_players_map,
             )
@@ -110,8 +124,8 @@ def simulate_series(input_data: SimulateSeriesInput) -> SimulateSeriesOutput:
             break
 
     # Construct final team objects with aggregated series stats
-    final_team_a = TeamWithSeriesStats(**input_data.teamA.model_dump(), players=team_a_players_series)
-    final_team_b = TeamWithSeriesStats(**input_data.teamB.model_dump(), players=team_b_players_series)
+    final_team_a = TeamWithSeriesStats(**{**input_data.teamA.__dict__, 'players': team_a_players_series})
+    final_team_b = TeamWithSeriesStats(**{**input_data.teamB.__dict__, 'players': team_b_players_series})
 
     return SimulateSeriesOutput(
         winner='A' if team_a_wins > team_b_wins else 'B',
@@ -0,0 +1,260 @@
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
+
+from src.data_structures import (
+    Player,
+    PlayerStats,
+    PlayerStatsData,
+    SimulateRoundInput,
+    SimulateSeriesInput,
+    SimulateSeriesOutput,
+    Team,
+    TeamData,
+    generate_stat,
+)
+from src.simulate_round_flow import simulate_round
+from src.simulate_series_flow import simulate_series
+from src.simulate_tactical_match_flow import TacticalMatchInputSchema, compile_strength_index, simulate_tactical_match
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# Accepts both the frontend ("md3") and the README ("bo3") spellings.
+FORMAT_GAMES_TO_WIN: Dict[str, int] = {
+    'md1': 1, 'md3': 2, 'md5': 3,
+    'bo1': 1, 'bo3': 2, 'bo5': 3,
+}
+
+ROUNDS_TO_WIN = 13
+ROUNDS_PER_HALF = 12
+
+# 'detailed' plays every duel and round; 'fast' resolves each map with the probabilistic map model
+ENGINE_MODES = ('detailed', 'fast')
+
+
+def check_series_format(series_format: Any, maps: Any = None) -> int:
+    """
+    Returns the games needed to win `series_format`. Raises ValueError for an unknown format,
+    or when `maps` is given and is not a list of map names with one map per possible game.
+    """
+    if not isinstance(series_format, str) or series_format not in FORMAT_GAMES_TO_WIN:
+        raise ValueError(f"Invalid series format: {series_format}")
+    games_to_win = FORMAT_GAMES_TO_WIN[series_format]
+    if maps is not None:
+        max_games = games_to_win * 2 - 1
+        if not isinstance(maps, list) or not all(isinstance(m, str) for m in maps):
+            raise ValueError("'maps' must be a list of map names.")
+        if len(maps) < max_games:
+            raise ValueError(f"Format {series_format} requires {max_games} maps, got {len(maps)}.")
+    return games_to_win
+
+
+def load_match_data(
+    data_dir: str = DATA_DIR,
+) -> Tuple[Dict[str, TeamData], Dict[str, PlayerStatsData]]:
+    """
+    Loads and validates the team and player stat files once.
+    """
+    with open(os.path.join(data_dir, 'teams.json'), 'r', encoding='utf-8') as f:
+        teams_raw = json.load(f)
+    with open(os.path.join(data_dir, 'player_stats.json'), 'r', encoding='utf-8') as f:
+        stats_raw = json.load(f)
+
+    teams = {team_id: TeamData(**data) for team_id, data in teams_raw.items()}
+    player_stats = {name: PlayerStatsData(**data) for name, data in stats_raw.items()}
+    return teams, player_stats
+
+
+def build_team(team_data: TeamData, player_stats: Dict[str, PlayerStatsData]) -> Team:
+    """
+    Turns a team's base data into a match-ready Team, rolling numeric stats from each player's tiers.
+    Both inputs come from load_match_data and are already validated.
+    """
+    players = []
+    for p in team_data.players:
+        tiers = player_stats[p.name]
+        players.append(
+            Player(
+                name=p.name,
+                role=p.role,
+                nationality=p.nationality,
+                age=p.age,
+                photo=p.photo,
+                stats=PlayerStats(
+                    aim=generate_stat(tiers.aim),
+                    hs=tiers.hs,
+                    support=generate_stat(tiers.support),
+                    clutch=generate_stat(tiers.clutch),
+                ),
+                alive=True,
+            )
+        )
+    return Team(name=team_data.name, players=players)
+
+
+def simulate_matchup(
+    teams: Dict[str, TeamData],
+    player_stats: Dict[str, PlayerStatsData],
+    team_a_id: str,
+    team_b_id: str,
+    games_to_win: int,
+    maps: Optional[List[str]] = None,
+) -> SimulateSeriesOutput:
+    """
+    Plays one whole series between two teams from load_match_data, with freshly rolled rosters.
+    """
+    return simulate_series(
+        SimulateSeriesInput(
+            teamA=build_team(teams[team_a_id], player_stats),
+            teamB=build_team(teams[team_b_id], player_stats),
+            gamesToWin=games_to_win,
+            maps=maps,
+        )
+    )
+
+
+def get_side(round_number: int, team: Literal['A', 'B']) -> Literal['attack', 'defense']:
+    """
+    Team A attacks first; sides swap at half-time and after every overtime pair.
+    """
+    if round_number <= ROUNDS_PER_HALF:
+        a_attacks = True
+    elif round_number <= ROUNDS_PER_HALF * 2:
+        a_attacks = False
+    else:
+        a_attacks = ((round_number - ROUNDS_PER_HALF * 2 - 1) // 2) % 2 == 0
+    if team == 'B':
+        a_attacks = not a_attacks
+    return 'attack' if a_attacks else 'defense'
+
+
+def is_map_over(score_a: int, score_b: int) -> bool:
+    if score_a >= ROUNDS_TO_WIN - 1 and score_b >= ROUNDS_TO_WIN - 1:
+        return abs(score_a - score_b) >= 2
+    return score_a >= ROUNDS_TO_WIN or score_b >= ROUNDS_TO_WIN
+
+
+def simulate_series_stream(
+    team_a_data: TeamData,
+    team_b_data: TeamData,
+    series_format: str,
+    maps: List[str],
+    player_stats: Dict[str, PlayerStatsData],
+    mode: Literal['detailed', 'fast'] = 'detailed',
+) -> Iterator[Dict[str, Any]]:
+    """
+    Simulates a series round by round, yielding the kill, round, map and series events
+    consumed by the match page. Every event carries a fresh snapshot of the match state.
+    In 'fast' mode each map is resolved at once, so only map and series events are emitted.
+    """
+    if mode not in ENGINE_MODES:
+        raise ValueError(f"Invalid engine mode: {mode}")
+    games_to_win = check_series_format(series_format, maps)
+    max_games = (games_to_win * 2) - 1
+
+    team_a = build_team(team_a_data, player_stats)
+    team_b = build_team(team_b_data, player_stats)
+    team_of = {p.name: 'A' for p in team_a.players}
+    team_of.update({p.name: 'B' for p in team_b.players})
+    team_ids = {'A': team_a_data.id, 'B': team_b_data.id}
+    strength_index = compile_strength_index({'A': team_a, 'B': team_b}, maps[:max_games]) if mode == 'fast' else None
+
+    series_score = {'A': 0, 'B': 0}
+    map_score = {'A': 0, 'B': 0}
+    kills = {name: 0 for name in team_of}
+    deaths = {name: 0 for name in team_of}
+    alive = {name: True for name in team_of}
+    rounds_played = 0
+    round_number = 1
+    map_index = 0
+
+    def player_rows(team: Team) -> List[Dict[str, Any]]:
+        return [
+            {
+                'name': p.name,
+                'is_alive': alive[p.name],
+                'stats': {
+                    'kills': kills[p.name],
+                    'deaths': deaths[p.name],
+                    'acs': kills[p.name] * 200 / rounds_played if rounds_played else 0,
+                },
+            }
+            for p in team.players
+        ]
+
+    def snapshot() -> Dict[str, Any]:
+        return {
+            'teamA': {'id': team_a_data.id, 'name': team_a_data.name},
+            'teamB': {'id': team_b_data.id, 'name': team_b_data.name},
+            'format': series_format,
+            'maps': maps,
+            'currentMapIndex': map_index,
+            'seriesScoreA': series_score['A'],
+            'seriesScoreB': series_score['B'],
+            'mapScoreA': map_score['A'],
+            'mapScoreB': map_score['B'],
+            'roundNumber': round_number,
+            'isOvertime': round_number > ROUNDS_PER_HALF * 2,
+            'teamARole': get_side(round_number, 'A'),
+            'teamBRole': get_side(round_number, 'B'),
+            'teamAPlayers': player_rows(team_a),
+            'teamBPlayers': player_rows(team_b),
+        }
+
+    yield {'type': 'series_start', 'state': snapshot()}
+
+    for map_index in range(max_games):
+        map_score = {'A': 0, 'B': 0}
+        kills = {name: 0 for name in team_of}
+        deaths = {name: 0 for name in team_of}
+        rounds_played = 0
+        round_number = 1
+
+        if mode == 'fast':
+            result = simulate_tactical_match(
+                TacticalMatchInputSchema(teamA=team_a, teamB=team_b, map=maps[map_index], offensivePlay='Default'),
+                strength_index,
+            )
+            for p in result.teamAStats + result.teamBStats:
+                kills[p.name] = p.kills
+                deaths[p.name] = p.deaths
+            map_score = {'A': result.scoreA, 'B': result.scoreB}
+            rounds_played = result.scoreA + result.scoreB
+            round_number = rounds_played + 1
+
+        while not is_map_over(map_score['A'], map_score['B']):
+            alive = {name: True for name in team_of}
+            result = simulate_round(SimulateRoundInput(teamA=team_a, teamB=team_b))
+
+            for kill in result.killFeed:
+                kills[kill.killer] += 1
+                deaths[kill.victim] += 1
+                alive[kill.victim] = False
+                yield {
+                    'type': 'kill',
+                    'data': {
+                        'killer_name': kill.killer,
+                        'victim_name': kill.victim,
+                        'killer_team_id': team_ids[team_of[kill.killer]],
+                        'victim_team_id': team_ids[team_of[kill.victim]],
+                    },
+                    'state': snapshot(),
+                }
+
+            winner = 'A' if result.winner == 'teamA' else 'B'
+            map_score[winner] += 1
+            rounds_played += 1
+            yield {'type': 'round_end', 'winner': team_ids[winner], 'state': snapshot()}
+            round_number += 1
+
+        map_winner = 'A' if map_score['A'] > map_score['B'] else 'B'
+        series_score[map_winner] += 1
+        round_number -= 1
+        yield {'type': 'map_end', 'winner': team_ids[map_winner], 'state': snapshot()}
+
+        if series_score[map_winner] >= games_to_win:
+            break
+
+    series_winner = 'A' if series_score['A'] > series_score['B'] else 'B'
+    yield {'type': 'series_end', 'winner': team_ids[series_winner], 'state': snapshot()}
@@ -1,16 +1,20 @@
 
 import random
-from typing import List, Literal, Union
+from typing import Dict, Iterable, List, Literal, Optional, Tuple, Union
 
 from pydantic import BaseModel, Field
 
-from src.data_structures import Player, Team, SimulateMatchOutput, potential_tiers
+from src.data_structures import MapModifiers, Player, Team, SimulateMatchOutput, potential_tiers
+from src.map_modifiers import get_map_modifiers, get_player_map_multiplier
+
+# Team strength keyed by (team key, map, side)
+StrengthIndex = Dict[Tuple[str, str, str], float]
 
 
 class TacticalMatchInputSchema(BaseModel):
     teamA: Team
     teamB: Team
-    map: str  # Although not used in this new logic, it's kept for API consistency
+    map: str
     offensivePlay: str  # Also kept for API consistency
 
 
@@ -56,11 +60,20 @@ def get_player_strength(player: Player, side: Literal['attack', 'defense']) -> f
     return raw_strength
 
 
-def get_team_strength(team: Team, side: Literal['attack', 'defense']) -> float:
+def get_team_strength(
+    team: Team,
+    side: Literal['attack', 'defense'],
+    map_multipliers: Optional[List[float]] = None,
+) -> float:
     """
-    Calculates the overall team strength for the match.
+    Calculates the overall team strength for the match. `map_multipliers` holds one factor per
+    player (see get_player_map_multiplier), applied to that player's strength.
     """
-    average_player_strength = sum(get_player_strength(p, side) for p in team.players) / len(team.players)
+    if map_multipliers is None:
+        map_multipliers = [1.0] * len(team.players)
+    average_player_strength = sum(
+        get_player_strength(p, side) * multiplier for p, multiplier in zip(team.players, map_multipliers)
+    ) / len(team.players)
 
     def get_stat_value(stat: Union[str, int]) -> int:
         if isinstance(stat, int):
@@ -74,20 +87,55 @@ def get_team_strength(team: Team, side: Literal['attack', 'defense']) -> float:
     avg_clutch = sum(get_stat_value(p.stats.clutch) for p in team.players) / len(team.players)
     cohesion_modifier = (avg_support + avg_clutch) / 20  # Scale it down to be a smaller bonus
 
-    # In the future, a map-specific bonus could be added here.
-    map_bonus = 0
-
-    return average_player_strength + cohesion_modifier + map_bonus
+    return average_player_strength + cohesion_modifier
 
 
-def run_probabilistic_map_sim(teamA: Team, teamB: Team) -> TacticalMatchOutputSchema:
+def compile_strength_index(
+    teams: Dict[str, Team],
+    maps: Iterable[str],
+    modifiers: Optional[Dict[str, MapModifiers]] = None,
+) -> StrengthIndex:
+    """
+    Precomputes every team's strength for each (team key, map, side), map bonuses included.
+    Rosters do not change during a series, so this is done once and the map simulation only reads it.
+    """
+    if modifiers is None:
+        modifiers = get_map_modifiers()
+    return {
+        (key, map_name, side): get_team_strength(
+            team, side, [get_player_map_multiplier(p, map_name, side, modifiers) for p in team.players]
+        )
+        for key, team in teams.items()
+        for map_name in set(maps)
+        for side in ('attack', 'defense')
+    }
+
+
+def run_probabilistic_map_sim(
+    teamA: Team,
+    teamB: Team,
+    strengths_a: Optional[Dict[str, float]] = None,
+    strengths_b: Optional[Dict[str, float]] = None,
+    rng=random,
+    with_player_stats: bool = True,
+) -> TacticalMatchOutputSchema:
     """
     Runs a probabilistic map simulation to determine the winner and score.
+    `strengths_a`/`strengths_b` map each side to the team's strength on this map; without them,
+    strengths are computed with no map bonus. `rng` defaults to the global random module;
+    pass a random.Random to draw from an isolated stream. Without `with_player_stats`,
+    only the winner and score are produced.
     """
     scoreA = 0
     scoreB = 0
     round_winners: List[Literal['A', 'B']] = []
 
+    # Team strength only depends on the map and side, so it is never computed per round
+    if strengths_a is None:
+        strengths_a = {side: get_team_strength(teamA, side) for side in ('attack', 'defense')}
+    if strengths_b is None:
+        strengths_b = {side: get_team_strength(teamB, side) for side in ('attack', 'defense')}
+
     # Simulate regulation rounds
     for round_num in range(1, 25):
         if scoreA >= 13 or scoreB >= 13:
@@ -98,8 +146,8 @@ def run_probabilistic_map_sim(teamA: Team, teamB: Team) -> TacticalMatchOutputSc
         team_a_side = 'attack' if is_first_half else 'defense'
         team_b_side = 'defense' if is_first_half else 'attack'
 
-        strengthA = get_team_strength(teamA, team_a_side)
-        strengthB = get_team_strength(teamB, team_b_side)
+        strengthA = strengths_a[team_a_side]
+        strengthB = strengths_b[team_b_side]
         probA_wins_round = strengthA / (strengthA + strengthB)
 
         # Apply bonus for winning the pistol round (rounds 2 and 14)
@@ -121,7 +169,7 @@ def run_probabilistic_map_sim(teamA: Team, teamB: Team) -> TacticalMatchOutputSc
             probA_wins_round = 0.35 if round_winners[12] == 'A' else 0.65
 
         winner: Literal['A', 'B']
-        if random.random() < probA_wins_round:
+        if rng.random() < probA_wins_round:
             scoreA += 1
             winner = 'A'
         else:
@@ -138,11 +186,11 @@ def run_probabilistic_map_sim(teamA: Team, teamB: Team) -> TacticalMatchOutputSc
             team_a_side_ot = 'attack' if is_first_ot_pair_side else 'defense'
             team_b_side_ot = 'defense' if is_first_ot_pair_side else 'attack'
 
-            strengthA_OT = get_team_strength(teamA, team_a_side_ot)
-            strengthB_OT = get_team_strength(teamB, team_b_side_ot)
+            strengthA_OT = strengths_a[team_a_side_ot]
+            strengthB_OT = strengths_b[team_b_side_ot]
             baseProbA_OT = strengthA_OT / (strengthA_OT + strengthB_OT)
 
-            if random.random() < baseProbA_OT:
+            if rng.random() < baseProbA_OT:
                 scoreA += 1
             else:
                 scoreB += 1
@@ -165,21 +213,24 @@ def run_probabilistic_map_sim(teamA: Team, teamB: Team) -> TacticalMatchOutputSc
             # --- Kill Calculation ---
             strength_kill_modifier = (player_strength - 80) / 100 + 1  # Mod around 1.0
             expected_kills = total_rounds * BASE_KILLS_PER_ROUND * strength_kill_modifier * PERFORMANCE_MODIFIER
-            kills = round(expected_kills + (random.random() - 0.5) * 5)
+            kills = round(expected_kills + (rng.random() - 0.5) * 5)
             kills = max(0, kills)
 
             # --- Death Calculation ---
             strength_death_modifier = 1 - (player_strength - 80) / 100  # Inverse mod around 1.0
             expected_deaths = total_rounds * BASE_DEATHS_PER_ROUND * strength_death_modifier * (1 / PERFORMANCE_MODIFIER)
-            deaths = round(expected_deaths + (random.random() - 0.5) * 5)
+            deaths = round(expected_deaths + (rng.random() - 0.5) * 5)
             deaths = max(0, deaths)
             deaths = min(total_rounds, deaths)
             
             stats.append(PlayerStats(name=p.name, kills=kills, deaths=deaths))
         return stats
 
-    teamA_stats = generate_player_stats(teamA, scoreA, scoreB)
-    teamB_stats = generate_player_stats(teamB, scoreB, scoreA)
+    if with_player_stats:
+        teamA_stats = generate_player_stats(teamA, scoreA, scoreB)
+        teamB_stats = generate_player_stats(teamB, scoreB, scoreA)
+    else:
+        teamA_stats = teamB_stats = []
 
     return TacticalMatchOutputSchema(
         winner=winner,
@@ -192,8 +243,20 @@ def run_probabilistic_map_sim(teamA: Team, teamB: Team) -> TacticalMatchOutputSc
     )
 
 
-def simulate_tactical_match(input_data: TacticalMatchInputSchema) -> TacticalMatchOutputSchema:
+def simulate_tactical_match(
+    input_data: TacticalMatchInputSchema,
+    strength_index: Optional[StrengthIndex] = None,
+) -> TacticalMatchOutputSchema:
     """
     Main function to simulate a tactical match.
+    Pass a `strength_index` compiled for teams 'A' and 'B' to reuse it across the maps of a series.
     """
-    return run_probabilistic_map_sim(input_data.teamA, input_data.teamB)
+    map_name = input_data.map
+    if strength_index is None:
+        strength_index = compile_strength_index({'A': input_data.teamA, 'B': input_data.teamB}, [map_name])
+    return run_probabilistic_map_sim(
+        input_data.teamA,
+        input_data.teamB,
+        {side: strength_index[('A', map_name, side)] for side in ('attack', 'defense')},
+        {side: strength_index[('B', map_name, side)] for side in ('attack', 'defense')},
+    )
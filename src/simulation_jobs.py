@@ -0,0 +1,472 @@
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import closing
+from typing import Any, Callable, Dict, List, Optional
+
+from src.distributions import DEFAULT_QUANTILES, SeriesDistributions
+from src.simulate_league_season_flow import (
+    DEFAULT_QUALIFYING_SPOTS,
+    REGIONS,
+    run_season_replicas,
+)
+from src.simulate_series_stream_flow import (
+    DATA_DIR,
+    FORMAT_GAMES_TO_WIN,
+    check_series_format,
+    load_match_data,
+    simulate_matchup,
+)
+
+MAX_ITERATIONS = 1_000_000
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+PROGRESS_INTERVAL_SECONDS = 0.5
+# A running job is owned by its worker until the lease expires; every progress report renews it
+LEASE_SECONDS = 60.0
+SUPERVISE_INTERVAL_SECONDS = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    expires_at REAL,
+    owner_pid INTEGER,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires_at);
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobStore:
+    """
+    SQLite-backed job table shared by the web process and the job workers.
+    Every method opens (and closes) its own connection for one short transaction, so one store
+    may be used from many threads. Connections run in autocommit mode.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+            # Tables created before leases existed
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (('owner_pid', 'INTEGER'), ('lease_expires', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params), time.time()),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'params': json.loads(row['params']),
+            'status': row['status'],
+            'progress': row['progress'],
+            'result': json.loads(row['result']) if row['result'] is not None else None,
+            'error': row['error'],
+            'createdAt': row['created_at'],
+            'finishedAt': row['finished_at'],
+            'expiresAt': row['expires_at'],
+        }
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Queued jobs are cancelled at once; running jobs are flagged and stop at their next progress check.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, now + self.ttl_seconds, job_id),
+            )
+            if cur.rowcount:
+                return True
+            cur = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,)
+            )
+            return cur.rowcount > 0
+
+    def claim_next(self, owner_pid: int) -> Optional[sqlite3.Row]:
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', owner_pid = ?, lease_expires = ? WHERE id = ?",
+                    (owner_pid, time.time() + LEASE_SECONDS, row['id']),
+                )
+            conn.execute("COMMIT")
+        return row
+
+    def report_progress(self, job_id: str, progress: float, owner_pid: int) -> bool:
+        """
+        Stores the progress and renews the lease. Returns True if the worker should stop:
+        cancellation was requested, or the job was requeued and is no longer this worker's.
+        """
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET progress = ?, lease_expires = ? "
+                "WHERE id = ? AND status = 'running' AND owner_pid = ?",
+                (progress, time.time() + LEASE_SECONDS, job_id, owner_pid),
+            )
+            if not cur.rowcount:
+                return True
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is None or bool(row['cancel_requested'])
+
+    def finish(
+        self, job_id: str, owner_pid: int, status: str, result: Any = None, error: Optional[str] = None
+    ) -> None:
+        """Ignored if the job was requeued in the meantime and now belongs to another worker."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END, "
+                "result = ?, error = ?, finished_at = ?, expires_at = ?, owner_pid = NULL, lease_expires = NULL "
+                "WHERE id = ? AND status = 'running' AND owner_pid = ?",
+                (
+                    status,
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    now,
+                    now + self.ttl_seconds,
+                    job_id,
+                    owner_pid,
+                ),
+            )
+
+    def requeue_stale(self) -> int:
+        """
+        Puts back 'running' jobs whose worker is gone: its process no longer exists, or it has
+        not renewed the lease in time. Jobs still owned by live workers (of this or another
+        server sharing the database) are left alone.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, owner_pid, lease_expires FROM jobs WHERE status = 'running'"
+            ).fetchall()
+            stale = [
+                row['id'] for row in rows
+                if row['lease_expires'] is None or row['lease_expires'] < now or not _pid_alive(row['owner_pid'])
+            ]
+            conn.executemany(
+                "UPDATE jobs SET status = 'queued', progress = 0, owner_pid = NULL, lease_expires = NULL "
+                "WHERE id = ?",
+                [(job_id,) for job_id in stale],
+            )
+            conn.execute("COMMIT")
+        return len(stale)
+
+    def evict_expired(self) -> int:
+        with closing(self._connect()) as conn:
+            cur = conn.execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+        return cur.rowcount
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+# --- Job kinds ---
+
+# Ids are checked to be strings before any dict lookup: a list or dict would raise
+# TypeError (unhashable) instead of a clean validation error. check_series_format does
+# the same for formats and map lists.
+
+def _check_team(team_id: Any, teams) -> None:
+    if not isinstance(team_id, str) or team_id not in teams:
+        raise ValueError(f"Unknown team: {team_id}")
+
+
+def _check_common(params: Dict[str, Any]) -> None:
+    check_series_format(params.get('format', 'md3'), params.get('maps'))
+    iterations = params.get('iterations')
+    if not isinstance(iterations, int) or isinstance(iterations, bool) or not 0 < iterations <= MAX_ITERATIONS:
+        raise ValueError(f"'iterations' must be an integer between 1 and {MAX_ITERATIONS}.")
+
+
+def validate_series_odds(params: Dict[str, Any], teams) -> None:
+    _check_common(params)
+    _check_team(params.get('teamA'), teams)
+    _check_team(params.get('teamB'), teams)
+
+
+def validate_series_distributions(params: Dict[str, Any], teams) -> None:
+    validate_series_odds(params, teams)
+    quantiles = params.get('quantiles')
+    if quantiles is not None and not (isinstance(quantiles, list) and quantiles and all(
+        isinstance(q, (int, float)) and not isinstance(q, bool) and 0 <= q <= 1 for q in quantiles
+    )):
+        raise ValueError("'quantiles' must be a non-empty list of numbers between 0 and 1.")
+
+
+def validate_matchup_matrix(params: Dict[str, Any], teams) -> None:
+    _check_common(params)
+    team_ids = params.get('teams')
+    if not isinstance(team_ids, list) or len(team_ids) < 2:
+        raise ValueError("'teams' must be a list with at least two team ids.")
+    for team_id in team_ids:
+        _check_team(team_id, teams)
+
+
+def validate_league_season(params: Dict[str, Any], teams) -> None:
+    check_series_format(params.get('format', 'md3'))
+    replicas = params.get('replicas')
+    if not isinstance(replicas, int) or isinstance(replicas, bool) or not 0 < replicas <= MAX_ITERATIONS:
+        raise ValueError(f"'replicas' must be an integer between 1 and {MAX_ITERATIONS}.")
+    seed = params.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+        raise ValueError("'seed' must be an integer.")
+    regions = params.get('regions', list(REGIONS))
+    if not isinstance(regions, list) or not regions or not all(isinstance(region, str) for region in regions):
+        raise ValueError("'regions' must be a non-empty list of region names.")
+    for region in regions:
+        if region not in REGIONS:
+            raise ValueError(f"Unknown region: {region}")
+    spots = params.get('spots', DEFAULT_QUALIFYING_SPOTS)
+    if not isinstance(spots, int) or isinstance(spots, bool) or spots < 1:
+        raise ValueError("'spots' must be a positive integer.")
+    correlation = params.get('statCorrelation', 0.0)
+    if not isinstance(correlation, (int, float)) or isinstance(correlation, bool) or not 0 <= correlation <= 1:
+        raise ValueError("'statCorrelation' must be a number between 0 and 1.")
+
+
+def _series_odds(
+    teams, player_stats, team_a_id: str, team_b_id: str, games_to_win: int,
+    iterations: int, tick: Callable[[], None], maps: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    wins_a = 0
+    scores: Counter = Counter()
+    for _ in range(iterations):
+        result = simulate_matchup(teams, player_stats, team_a_id, team_b_id, games_to_win, maps)
+        wins_a += result.winner == 'A'
+        scores[f"{result.teamAScore}-{result.teamBScore}"] += 1
+        tick()
+    return {
+        'teamA': team_a_id,
+        'teamB': team_b_id,
+        'iterations': iterations,
+        'teamAWinProbability': wins_a / iterations,
+        'seriesScores': {score: count / iterations for score, count in sorted(scores.items())},
+    }
+
+
+def run_series_odds(params: Dict[str, Any], teams, player_stats, progress: Callable[[float], None]) -> Dict[str, Any]:
+    iterations = params['iterations']
+    done = 0
+
+    def tick():
+        nonlocal done
+        done += 1
+        progress(done / iterations)
+
+    return _series_odds(
+        teams, player_stats, params['teamA'], params['teamB'],
+        FORMAT_GAMES_TO_WIN[params.get('format', 'md3')], iterations, tick, params.get('maps'),
+    )
+
+
+def run_series_distributions(params: Dict[str, Any], teams, player_stats, progress: Callable[[float], None]) -> Dict[str, Any]:
+    iterations = params['iterations']
+    games_to_win = FORMAT_GAMES_TO_WIN[params.get('format', 'md3')]
+    summary = SeriesDistributions()
+    for done in range(1, iterations + 1):
+        summary.add_series(
+            simulate_matchup(teams, player_stats, params['teamA'], params['teamB'], games_to_win, params.get('maps'))
+        )
+        progress(done / iterations)
+    return summary.report(params.get('quantiles', DEFAULT_QUANTILES))
+
+
+def run_matchup_matrix(params: Dict[str, Any], teams, player_stats, progress: Callable[[float], None]) -> Dict[str, Any]:
+    team_ids: List[str] = params['teams']
+    iterations = params['iterations']
+    games_to_win = FORMAT_GAMES_TO_WIN[params.get('format', 'md3')]
+    pairs = [(a, b) for i, a in enumerate(team_ids) for b in team_ids[i + 1:]]
+    total = len(pairs) * iterations
+    done = 0
+
+    def tick():
+        nonlocal done
+        done += 1
+        progress(done / total)
+
+    matrix: Dict[str, Dict[str, float]] = {team_id: {} for team_id in team_ids}
+    for a, b in pairs:
+        odds = _series_odds(teams, player_stats, a, b, games_to_win, iterations, tick, params.get('maps'))
+        matrix[a][b] = odds['teamAWinProbability']
+        matrix[b][a] = 1 - odds['teamAWinProbability']
+    return {'teams': team_ids, 'iterations': iterations, 'matrix': matrix}
+
+
+def run_league_season(params: Dict[str, Any], teams, player_stats, progress: Callable[[float], None]) -> Dict[str, Any]:
+    tally = run_season_replicas(
+        range(params['replicas']),
+        teams,
+        player_stats,
+        regions=tuple(params.get('regions', REGIONS)),
+        games_to_win=FORMAT_GAMES_TO_WIN[params.get('format', 'md3')],
+        seed=params.get('seed'),
+        progress=progress,
+        stat_correlation=params.get('statCorrelation', 0.0),
+    )
+    return tally.report(params.get('spots', DEFAULT_QUALIFYING_SPOTS))
+
+
+JOB_KINDS = {
+    'series_odds': (validate_series_odds, run_series_odds),
+    'matchup_matrix': (validate_matchup_matrix, run_matchup_matrix),
+    'league_season': (validate_league_season, run_league_season),
+    'series_distributions': (validate_series_distributions, run_series_distributions),
+}
+
+
+# --- Worker processes ---
+
+def _job_worker_main(db_path: str, data_dir: str, ttl_seconds: float, poll_interval: float) -> None:
+    store = JobStore(db_path, ttl_seconds)
+    teams, player_stats = load_match_data(data_dir)
+    pid = os.getpid()
+
+    while True:
+        row = store.claim_next(pid)
+        if row is None:
+            store.evict_expired()
+            time.sleep(poll_interval)
+            continue
+
+        job_id = row['id']
+        last_report = 0.0
+
+        def progress(fraction: float) -> None:
+            nonlocal last_report
+            now = time.monotonic()
+            if now - last_report < PROGRESS_INTERVAL_SECONDS:
+                return
+            last_report = now
+            if store.report_progress(job_id, fraction, pid):
+                raise JobCancelled()
+
+        _, runner = JOB_KINDS[row['kind']]
+        try:
+            result = runner(json.loads(row['params']), teams, player_stats, progress)
+        except JobCancelled:
+            store.finish(job_id, pid, 'cancelled')
+        except Exception as e:
+            store.finish(job_id, pid, 'failed', error=str(e))
+        else:
+            store.finish(job_id, pid, 'done', result=result)
+
+
+class SimulationJobQueue:
+    """
+    Submit/poll/cancel front for heavy simulation jobs, executed by background worker processes.
+    A supervisor thread replaces workers that die and requeues the jobs they were running.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        workers: int,
+        data_dir: str = DATA_DIR,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        poll_interval: float = 0.5,
+    ):
+        self.store = JobStore(db_path, ttl_seconds)
+        self.store.requeue_stale()
+        self._teams, _ = load_match_data(data_dir)
+        self._ctx = multiprocessing.get_context('spawn')
+        self._worker_args = (db_path, data_dir, ttl_seconds, poll_interval)
+        self._processes = [self._spawn_worker() for _ in range(max(1, workers))]
+        self._stopping = threading.Event()
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+
+    def _spawn_worker(self) -> multiprocessing.Process:
+        process = self._ctx.Process(target=_job_worker_main, args=self._worker_args, daemon=True)
+        process.start()
+        return process
+
+    def _supervise(self) -> None:
+        while not self._stopping.wait(SUPERVISE_INTERVAL_SECONDS):
+            for i, process in enumerate(self._processes):
+                if not process.is_alive() and not self._stopping.is_set():
+                    process.join(timeout=0)
+                    self._processes[i] = self._spawn_worker()
+            self.store.requeue_stale()
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        """Validates the job and queues it. Raises ValueError for unknown kinds or bad params."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if not isinstance(params, dict):
+            raise ValueError("'params' must be an object.")
+        validate, _ = JOB_KINDS[kind]
+        validate(params, self._teams)
+        self.store.evict_expired()
+        return self.store.submit(kind, params)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        return self.store.cancel(job_id)
+
+    def shutdown(self) -> None:
+        self._stopping.set()
+        self._supervisor.join(timeout=2)
+        for process in self._processes:
+            process.kill()
+            process.join(timeout=2)
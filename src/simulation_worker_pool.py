@@ -0,0 +1,170 @@
+
+import itertools
+import multiprocessing
+import queue
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# --- Worker side ---
+
+def _run_job(params: Dict[str, Any], teams, player_stats) -> Iterator[Dict[str, Any]]:
+    from src.simulate_series_stream_flow import simulate_series_stream
+
+    team_a_id, team_b_id = params['teamA'], params['teamB']
+    if team_a_id not in teams or team_b_id not in teams:
+        raise ValueError("One or both teams were not found.")
+    return simulate_series_stream(
+        teams[team_a_id],
+        teams[team_b_id],
+        params['format'],
+        params['maps'],
+        player_stats,
+        params.get('mode', 'detailed'),
+    )
+
+
+def _worker_main(conn: Connection, data_dir: Optional[str]) -> None:
+    """
+    Worker loop. Loads the engine and the validated data once, then serves jobs over `conn`.
+
+    Protocol (parent -> worker): ('run', job_id, params), ('cancel', job_id), ('stop',).
+    Protocol (worker -> parent): ('event', job_id, event) for each event, then exactly one
+    terminal message: ('done', job_id, None), ('cancelled', job_id, None) or ('error', job_id, message).
+    """
+    from src.simulate_series_stream_flow import DATA_DIR, load_match_data
+
+    teams, player_stats = load_match_data(data_dir or DATA_DIR)
+    conn.send(('ready', None, None))
+
+    while True:
+        message = conn.recv()
+        if message[0] == 'stop':
+            return
+        if message[0] != 'run':
+            continue  # Stale cancel for a job that already finished
+
+        _, job_id, params = message
+        terminal = ('done', job_id, None)
+        try:
+            for event in _run_job(params, teams, player_stats):
+                if conn.poll():
+                    control = conn.recv()
+                    if control[0] == 'stop':
+                        return
+                    if control[0] == 'cancel' and control[1] == job_id:
+                        terminal = ('cancelled', job_id, None)
+                        break
+                conn.send(('event', job_id, event))
+        except Exception as e:
+            terminal = ('error', job_id, str(e))
+        conn.send(terminal)
+
+
+# --- Parent side ---
+
+class _Worker:
+    def __init__(self, ctx, data_dir: Optional[str]):
+        self.conn, child_conn = ctx.Pipe(duplex=True)
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, data_dir), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self) -> None:
+        kind, _, _ = self.conn.recv()
+        if kind != 'ready':
+            raise RuntimeError("Simulation worker failed to start.")
+
+
+class SimulationWorkerPool:
+    """
+    A fixed set of long-lived, pre-warmed simulation processes.
+
+    Each job gets a worker for its whole lifetime, so events are streamed straight from that
+    worker's pipe. Closing the iterator returned by `stream()` (e.g. the client disconnected)
+    cancels the job and hands the worker back to the pool.
+    """
+
+    def __init__(self, size: int, data_dir: Optional[str] = None):
+        ctx = multiprocessing.get_context('spawn')
+        self._ctx = ctx
+        self._data_dir = data_dir
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._workers: List[_Worker] = [_Worker(ctx, data_dir) for _ in range(max(1, size))]
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for worker in self._workers:
+            worker.wait_ready()
+            self._idle.put(worker)
+        self._closed = False
+
+    def stream(
+        self, params: Dict[str, Any], timeout: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Runs a series simulation on a warm worker and yields its events.
+        Raises queue.Empty if no worker frees up within `timeout`.
+        """
+        if self._closed:
+            raise RuntimeError("The simulation pool is shut down.")
+        worker = self._idle.get(timeout=timeout)
+        with self._lock:
+            job_id = next(self._job_ids)
+
+        finished = False
+        try:
+            worker.conn.send(('run', job_id, params))
+            while True:
+                kind, msg_job_id, payload = worker.conn.recv()
+                if msg_job_id != job_id:
+                    continue
+                if kind == 'event':
+                    yield payload
+                    continue
+                finished = True
+                if kind == 'error':
+                    raise RuntimeError(payload)
+                return
+        finally:
+            if not finished:
+                self._cancel(worker, job_id)
+            self._release(worker)
+
+    def _cancel(self, worker: _Worker, job_id: int) -> None:
+        try:
+            worker.conn.send(('cancel', job_id))
+            # Drain until the job's terminal message so the pipe is clean for the next job.
+            while True:
+                kind, msg_job_id, _ = worker.conn.recv()
+                if msg_job_id == job_id and kind != 'event':
+                    return
+        except (EOFError, OSError):
+            worker.process.kill()
+
+    def _release(self, worker: _Worker) -> None:
+        if self._closed:
+            return
+        if not worker.process.is_alive():
+            worker.conn.close()
+            worker = self._replace(worker)
+        self._idle.put(worker)
+
+    def _replace(self, dead: _Worker) -> _Worker:
+        fresh = _Worker(self._ctx, self._data_dir)
+        fresh.wait_ready()
+        with self._lock:
+            self._workers[self._workers.index(dead)] = fresh
+        return fresh
+
+    def shutdown(self) -> None:
+        self._closed = True
+        for worker in self._workers:
+            try:
+                worker.conn.send(('stop',))
+            except (EOFError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=2)
+            if worker.process.is_alive():
+                worker.process.kill()
@@ -0,0 +1,302 @@
+
+import math
+import random
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.data_structures import Player, PlayerStats, PlayerStatsData, Team, TeamData, TeamDataPlayer, potential_tiers
+from src.simulate_series_flow import DEFAULT_MAP
+from src.simulate_series_stream_flow import check_series_format
+from src.simulate_tactical_match_flow import StrengthIndex, compile_strength_index, run_probabilistic_map_sim
+
+DEFAULT_WHAT_IF_ITERATIONS = 2000
+MAX_WHAT_IF_ITERATIONS = 20000
+BASELINE_CACHE_SIZE = 8
+ROLLED_STATS = ('aim', 'support', 'clutch')
+SIDES = ('attack', 'defense')
+Z_95 = 1.96
+
+
+class Substitution(BaseModel):
+    team: Literal['A', 'B']
+    out: str
+    incoming: str = Field(alias='in')
+    role: Optional[str] = None  # Defaults to the player's role in teams.json, else the role of the player replaced
+
+
+class TierChange(BaseModel):
+    player: str
+    stat: Literal['aim', 'support', 'clutch']
+    tier: Literal['S', 'A', 'B', 'C', 'D']
+
+
+class WhatIfInput(BaseModel):
+    teamA: str
+    teamB: str
+    format: str = 'md3'
+    maps: Optional[List[str]] = None
+    # At least two replicas, so the paired confidence interval has a variance to estimate
+    iterations: int = Field(DEFAULT_WHAT_IF_ITERATIONS, ge=2, le=MAX_WHAT_IF_ITERATIONS)
+    seed: int = 0
+    substitutions: List[Substitution] = Field(default_factory=list)
+    tierChanges: List[TierChange] = Field(default_factory=list)
+
+
+def roll_stat(tier: str, u: float) -> int:
+    """
+    Maps a uniform draw to a stat inside the tier's range. The same draw lands at the same
+    relative spot in every tier, so changing a tier keeps the player's luck in that replica.
+    """
+    min_val, max_val = potential_tiers[tier]
+    return min_val + int(u * (max_val - min_val + 1))
+
+
+def player_draws(seed: int, replica: int, name: str) -> Tuple[float, ...]:
+    """
+    Each player has their own random stream per replica, so changing one player never shifts
+    the stats rolled for anyone else.
+    """
+    rng = random.Random(f"{seed}:{replica}:{name}")
+    return tuple(rng.random() for _ in ROLLED_STATS)
+
+
+def match_stream(seed: int, replica: int) -> random.Random:
+    """Random stream for the rounds of one replica, shared by the baseline and every variant."""
+    return random.Random(seed * 1_000_003 + replica)
+
+
+class BaselineRun:
+    """
+    Cached per-replica results of a baseline matchup: each series outcome and, as one array
+    per (team, map, side), each team's strength with that replica's rolled stats.
+    """
+
+    def __init__(self, iterations: int, strength_keys: Sequence[Tuple[str, str, str]]):
+        self.iterations = iterations
+        self.wins_a: List[int] = []
+        self.scores: List[Tuple[int, int]] = []
+        self.strengths: Dict[Tuple[str, str, str], array] = {key: array('d') for key in strength_keys}
+
+
+class WhatIfSimulator:
+    """
+    Answers "what if" questions about a matchup (substitutions, tier changes) with paired
+    replicas: replica i of the baseline and of the variant share the same seeded streams, so
+    the difference in odds comes from the change and not from noise. Baselines are cached,
+    and only the teams touched by a change are rebuilt and have their strengths recompiled.
+    """
+
+    def __init__(self, teams: Dict[str, TeamData], player_stats: Dict[str, PlayerStatsData]):
+        self.teams = teams
+        self.player_stats = player_stats
+        self.known_players: Dict[str, TeamDataPlayer] = {
+            p.name: p for team in teams.values() for p in team.players
+        }
+        self._cache: 'OrderedDict[tuple, BaselineRun]' = OrderedDict()
+        # Baselines being computed; identical requests wait for that run instead of repeating it
+        self._in_flight: Dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    # --- Rosters ---
+
+    def _build_player(self, info: TeamDataPlayer, tiers: Dict[str, str], draws: Tuple[float, ...]) -> Player:
+        rolled = {stat: roll_stat(tiers[stat], u) for stat, u in zip(ROLLED_STATS, draws)}
+        return Player(
+            name=info.name,
+            role=info.role,
+            nationality=info.nationality,
+            age=info.age,
+            photo=info.photo,
+            stats=PlayerStats(hs=self.player_stats[info.name].hs, **rolled),
+            alive=True,
+        )
+
+    def _build_team(
+        self,
+        name: str,
+        roster: List[TeamDataPlayer],
+        tier_overrides: Dict[str, Dict[str, str]],
+        seed: int,
+        replica: int,
+    ) -> Team:
+        players = []
+        for info in roster:
+            tiers = {stat: getattr(self.player_stats[info.name], stat) for stat in ROLLED_STATS}
+            tiers.update(tier_overrides.get(info.name, {}))
+            players.append(self._build_player(info, tiers, player_draws(seed, replica, info.name)))
+        return Team(name=name, players=players)
+
+    def _apply_substitutions(self, params: WhatIfInput) -> Dict[str, List[TeamDataPlayer]]:
+        rosters = {
+            'A': list(self.teams[params.teamA].players),
+            'B': list(self.teams[params.teamB].players),
+        }
+        for sub in params.substitutions:
+            roster = rosters[sub.team]
+            names = [p.name for p in roster]
+            if sub.out not in names:
+                raise ValueError(f"{sub.out} is not on team {sub.team}'s roster.")
+            if sub.incoming not in self.player_stats:
+                raise ValueError(f"Unknown player: {sub.incoming}")
+            if any(sub.incoming == p.name for r in rosters.values() for p in r):
+                raise ValueError(f"{sub.incoming} is already playing in this matchup.")
+            replaced = roster[names.index(sub.out)]
+            # Players without a team entry only have tiers; the rest of their profile is borrowed
+            base = self.known_players.get(sub.incoming, replaced)
+            roster[names.index(sub.out)] = TeamDataPlayer(
+                name=sub.incoming,
+                role=sub.role or base.role,
+                nationality=base.nationality,
+                age=base.age,
+            )
+        return rosters
+
+    # --- Simulation ---
+
+    @staticmethod
+    def _play_series(
+        team_a: Team,
+        team_b: Team,
+        games_to_win: int,
+        maps: List[str],
+        strengths: Dict[str, Dict[str, Dict[str, float]]],
+        rng: random.Random,
+    ) -> Tuple[int, int]:
+        wins = {'A': 0, 'B': 0}
+        for map_name in maps:
+            result = run_probabilistic_map_sim(
+                team_a, team_b, strengths['A'][map_name], strengths['B'][map_name],
+                rng=rng, with_player_stats=False,
+            )
+            wins[result.winner] += 1
+            if wins[result.winner] >= games_to_win:
+                break
+        return wins['A'], wins['B']
+
+    def _baseline(self, params: WhatIfInput, games_to_win: int, maps: List[str]) -> Tuple[BaselineRun, bool]:
+        key = (params.teamA, params.teamB, games_to_win, tuple(maps), params.iterations, params.seed)
+        while True:
+            with self._lock:
+                run = self._cache.get(key)
+                if run is not None:
+                    self._cache.move_to_end(key)
+                    return run, True
+                pending = self._in_flight.get(key)
+                if pending is None:
+                    done = self._in_flight[key] = threading.Event()
+                    break
+            # If that run fails, the next waiter computes the baseline itself
+            pending.wait()
+
+        try:
+            run = self._compute_baseline(params, games_to_win, maps)
+            with self._lock:
+                self._cache[key] = run
+                while len(self._cache) > BASELINE_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            done.set()
+        return run, False
+
+    def _compute_baseline(self, params: WhatIfInput, games_to_win: int, maps: List[str]) -> BaselineRun:
+        team_data = {'A': self.teams[params.teamA], 'B': self.teams[params.teamB]}
+        strength_keys = [(t, m, side) for t in ('A', 'B') for m in set(maps) for side in SIDES]
+        run = BaselineRun(params.iterations, strength_keys)
+        for replica in range(params.iterations):
+            teams = {
+                t: self._build_team(data.name, list(data.players), {}, params.seed, replica)
+                for t, data in team_data.items()
+            }
+            index = compile_strength_index(teams, maps)
+            for k in strength_keys:
+                run.strengths[k].append(index[k])
+            score = self._play_series(
+                teams['A'], teams['B'], games_to_win, maps, self._by_map(index, maps),
+                match_stream(params.seed, replica),
+            )
+            run.scores.append(score)
+            run.wins_a.append(1 if score[0] > score[1] else 0)
+        return run
+
+    @staticmethod
+    def _by_map(index: StrengthIndex, maps: List[str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return {
+            t: {m: {side: index[(t, m, side)] for side in SIDES} for m in maps}
+            for t in ('A', 'B')
+        }
+
+    def run(self, params: WhatIfInput) -> Dict[str, Any]:
+        for team_id in (params.teamA, params.teamB):
+            if team_id not in self.teams:
+                raise ValueError(f"Unknown team: {team_id}")
+        games_to_win = check_series_format(params.format, params.maps or None)
+        max_games = games_to_win * 2 - 1
+        maps = (params.maps or [DEFAULT_MAP] * max_games)[:max_games]
+
+        rosters = self._apply_substitutions(params)
+        tier_overrides: Dict[str, Dict[str, str]] = {}
+        for change in params.tierChanges:
+            if not any(change.player == p.name for r in rosters.values() for p in r):
+                raise ValueError(f"{change.player} is not playing in this matchup.")
+            tier_overrides.setdefault(change.player, {})[change.stat] = change.tier
+        changed = {sub.team for sub in params.substitutions}
+        changed.update(t for t, roster in rosters.items() if any(p.name in tier_overrides for p in roster))
+
+        baseline, cached = self._baseline(params, games_to_win, maps)
+        names = {'A': self.teams[params.teamA].name, 'B': self.teams[params.teamB].name}
+        # With strengths given and player stats skipped, the map model never looks at an unchanged
+        # team's players, so that team is only rebuilt as an empty placeholder
+        placeholders = {t: Team.model_construct(name=names[t], players=[]) for t in ('A', 'B')}
+        variant_scores: List[Tuple[int, int]] = []
+        diffs: List[int] = []
+        for replica in range(params.iterations):
+            teams = dict(placeholders)
+            index: StrengthIndex = {}
+            for t in ('A', 'B'):
+                if t in changed:
+                    teams[t] = self._build_team(names[t], rosters[t], tier_overrides, params.seed, replica)
+                    index.update(compile_strength_index({t: teams[t]}, maps))
+                else:
+                    for m in maps:
+                        for side in SIDES:
+                            index[(t, m, side)] = baseline.strengths[(t, m, side)][replica]
+            score = self._play_series(
+                teams['A'], teams['B'], games_to_win, maps, self._by_map(index, maps),
+                match_stream(params.seed, replica),
+            )
+            variant_scores.append(score)
+            diffs.append((1 if score[0] > score[1] else 0) - baseline.wins_a[replica])
+
+        n = params.iterations
+        mean_diff = sum(diffs) / n
+        variance = sum((d - mean_diff) ** 2 for d in diffs) / (n - 1) if n > 1 else 0.0
+        margin = Z_95 * math.sqrt(variance / n)
+        return {
+            'teamA': params.teamA,
+            'teamB': params.teamB,
+            'format': params.format,
+            'maps': maps,
+            'iterations': n,
+            'seed': params.seed,
+            'baselineCached': cached,
+            'baseline': _odds(baseline.scores),
+            'whatIf': _odds(variant_scores),
+            'teamAWinProbabilityDelta': mean_diff,
+            'confidenceInterval95': [mean_diff - margin, mean_diff + margin],
+            'seriesFlipped': sum(1 for d in diffs if d) / n,
+        }
+
+
+def _odds(scores: List[Tuple[int, int]]) -> Dict[str, Any]:
+    n = len(scores)
+    counts = Counter(f"{a}-{b}" for a, b in scores)
+    return {
+        'teamAWinProbability': sum(1 for a, b in scores if a > b) / n,
+        'seriesScores': {score: count / n for score, count in sorted(counts.items())},
+    }
@@ -0,0 +1,92 @@
+import shutil
+
+import pytest
+
+from src.results_store import ResultsStore
+
+
+def make_series(winner='A', maps=(('bind', 13, 7), ('haven', 14, 12))):
+    def team(prefix):
+        return {
+            'name': prefix,
+            'players': [{'name': f"{prefix}{i}", 'stats': {'kills': 20 + i, 'deaths': 15}} for i in range(5)],
+        }
+
+    return {
+        'winner': winner,
+        'teamAScore': 2 if winner == 'A' else 0,
+        'teamBScore': 0 if winner == 'A' else 2,
+        'teamA': team('a'),
+        'teamB': team('b'),
+        'mapResults': [
+            {'winner': 'A' if a > b else 'B', 'scoreA': a, 'scoreB': b, 'map': name} for name, a, b in maps
+        ],
+    }
+
+
+def test_torn_tail_is_repaired_before_appending(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append_many([('x', 'y', make_series())] * 3, played_at=1000.0)
+
+    # An append interrupted halfway: orphan map/player rows and a partial series record
+    for name in ('maps.dat', 'players.dat', 'series.dat'):
+        with open(tmp_path / name, 'ab') as f:
+            f.write(b'\x07' * 10)
+
+    number = store.append('x', 'z', make_series(winner='B'), played_at=2000.0)
+    assert number == 3
+    assert store.series.get(3)[1:3] == (store._ids['teams']['x'], store._ids['teams']['z'])
+    assert store.head_to_head('x', 'y')['series'] == 3
+    assert store.head_to_head('x', 'z')['seriesWins'] == {'x': 0, 'z': 1}
+    assert store.player_kd('a0', last=10)['series'] == 4
+    assert store.overtime_rate('x')['maps'] == 8
+    assert store.get_series(3)['winner'] == 'B'
+
+    store.rebuild_indexes()
+    assert store.head_to_head('x', 'y')['series'] == 3
+    assert ResultsStore(str(tmp_path)).player_kd('b4', last=10)['series'] == 4
+
+
+def test_series_written_before_a_crash_in_the_heads_are_relinked(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append('x', 'y', make_series(), played_at=1000.0)
+    saved = tmp_path / 'saved'
+    saved.mkdir()
+    for name in ('teams.heads', 'players.heads', 'maps.heads', 'indexed'):
+        shutil.copy(tmp_path / name, saved / name)
+    store.append('x', 'y', make_series(winner='B'), played_at=2000.0)
+    # The append of series 1 died after its records were written, before the heads were
+    for name in ('teams.heads', 'players.heads', 'maps.heads', 'indexed'):
+        shutil.copy(saved / name, tmp_path / name)
+
+    store = ResultsStore(str(tmp_path))
+    store.append('x', 'y', make_series(), played_at=3000.0)
+    assert len(store) == 3
+    assert store.head_to_head('x', 'y')['series'] == 3
+    assert store.head_to_head('x', 'y')['seriesWins'] == {'x': 2, 'y': 1}
+    assert store.player_kd('b2', last=10)['series'] == 3
+    assert store.overtime_rate(map_name='haven')['maps'] == 3
+
+    store.rebuild_indexes()
+    assert store.head_to_head('x', 'y')['series'] == 3
+    assert store.overtime_rate('y')['maps'] == 6
+
+
+def test_rebuild_drops_rows_without_a_series(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append('x', 'y', make_series(), played_at=1000.0)
+    with open(tmp_path / 'maps.dat', 'ab') as f:
+        f.write(b'\x01' * (store.maps.record.size * 2))
+
+    store.rebuild_indexes()
+    assert len(store.maps) == 2
+    assert store.overtime_rate(map_name='bind')['maps'] == 1
+
+
+def test_played_at_cannot_go_back(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append_many([('x', 'y', make_series())] * 50, played_at=2000.0)
+    with pytest.raises(ValueError):
+        store.append('x', 'y', make_series(), played_at=1000.0)
+    assert store.head_to_head('x', 'y', since=1500.0)['series'] == 50
+    assert store.player_kd('a1', last=10, since=1500.0)['series'] == 10